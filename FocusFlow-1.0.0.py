@@ -1,87 +1,384 @@
+import time
+# Taken before the heavy imports so the launch-to-interactive time includes them
+LAUNCH_TIME = time.perf_counter()
 import cv2
 import mediapipe as mp
-import pyautogui
+import numpy as np
 import threading
-import time
+import multiprocessing
+import multiprocessing.connection
+from multiprocessing import shared_memory
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as sr
 from faster_whisper import WhisperModel
 import queue
+from collections import deque, namedtuple
 import re
 import os
+import sys
+import signal
+import csv
+import argparse
 from datetime import datetime
 import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
 
-# Initialize MediaPipe Face Mesh and Hands
+try:
+    import pyautogui
+except Exception:
+    # pyautogui needs a display; headless replay runs without it and never presses keys
+    pyautogui = None
+
+class LazyModel:
+    # Builds a model on first use instead of at import. warm_up() builds it on
+    # a background thread ahead of time; get() waits for a warm-up already in
+    # progress rather than building a second copy.
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.model = None
+        self.state = "not loaded"
+        self.load_seconds = None
+        self.lock = threading.Lock()
+    
+    @property
+    def ready(self):
+        return self.model is not None
+    
+    def get(self):
+        if self.model is None:
+            with self.lock:
+                if self.model is None:
+                    self.state = "loading"
+                    start = time.perf_counter()
+                    try:
+                        model = self.factory()
+                    except Exception:
+                        self.state = "failed"
+                        raise
+                    self.load_seconds = time.perf_counter() - start
+                    self.model = model
+                    self.state = "ready"
+                    print(f"{self.name} loaded in {self.load_seconds:.2f}s")
+        return self.model
+    
+    def warm_up(self, on_done=None):
+        def load():
+            try:
+                self.get()
+            except Exception as e:
+                print(f"Error loading {self.name}: {str(e)}")
+            if on_done is not None:
+                on_done(self)
+        if self.state == "not loaded":
+            self.state = "loading"
+            threading.Thread(target=load, name=f"warm-up {self.name}", daemon=True).start()
+
+# MediaPipe models, created on first use
 mp_face_mesh = mp.solutions.face_mesh
+mp_face_detection = mp.solutions.face_detection
 mp_hands = mp.solutions.hands
-face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True, min_detection_confidence=0.5)
-hands = mp_hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
 
-# Initialize speech recognition components
+def create_face_mesh(static_image_mode=False):
+    # Nothing reads the refined iris landmarks (468-477), so the iris model is left out of every pass
+    return mp_face_mesh.FaceMesh(static_image_mode=static_image_mode, refine_landmarks=False,
+                                 min_detection_confidence=0.5)
+
+def create_hands(static_image_mode=False):
+    return mp_hands.Hands(static_image_mode=static_image_mode, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+def create_face_detector():
+    # Short-range model, for faces within about 2 m of the camera
+    return mp_face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.5)
+
+face_detector = LazyModel("Face Detection", create_face_detector)
+face_mesh = LazyModel("Face Mesh", create_face_mesh)
+# Separate instance for face ROI crops, its internal tracking state lives in crop coordinates
+face_mesh_roi = LazyModel("Face Mesh (ROI)", create_face_mesh)
+hands = LazyModel("Hands", create_hands)
+
+# Voice commands: the capture thread queues each utterance the recognizer's
+# voice activity detection cuts out, and VOICE_TRANSCRIBE_WORKERS threads
+# transcribe them; the commands still run one at a time, in the order they
+# were spoken. At most VOICE_QUEUE_SIZE utterances wait; when the queue is
+# full the oldest is dropped, since the newest command is the one the user is
+# waiting on. Idle workers check for shutdown every VOICE_QUEUE_POLL seconds.
+VOICE_QUEUE_SIZE = 4
+VOICE_TRANSCRIBE_WORKERS = 1
+VOICE_QUEUE_POLL = 0.5
+
+# Speech recognition components; Whisper is loaded when the AI assistant is first turned on
 recognizer = sr.Recognizer()
-whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
-voice_command_queue = queue.Queue()
+# num_workers lets that many threads transcribe at the same time
+whisper_model = LazyModel("Whisper", lambda: WhisperModel("tiny", device="cpu", compute_type="int8",
+                                                          num_workers=VOICE_TRANSCRIBE_WORKERS))
+voice_command_queue = queue.Queue(maxsize=VOICE_QUEUE_SIZE)
+# Whisper takes 16 kHz mono float32 samples
+WHISPER_SAMPLE_RATE = 16000
+
+def audio_to_array(audio):
+    # Microphone audio as the float32 array Whisper transcribes in memory,
+    # without a WAV file round trip
+    pcm = audio.get_raw_data(convert_rate=WHISPER_SAMPLE_RATE, convert_width=2)
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
 
 # Default thresholds
 LOOK_THRESHOLD = 0.125
 SIDE_LOOK_THRESHOLD = 0.01
 
 # Added drowsiness detection thresholds
-BLINK_THRESHOLD = 0.5
 DROWSY_BLINK_DURATION = 0.5
 HEAD_TILT_THRESHOLD = 0.3
 DROWSY_ALERT_INTERVAL = 30
 
-# Playback state
-is_playing = True
+# Capture settings
+CAMERA_INDEX = 0
+DEFAULT_CAPTURE_BACKEND = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+FRAME_BUFFER_SIZE = 2
+FRAME_WAIT_TIMEOUT = 1.0
+
+# Camera probing: each candidate profile is timed and the cheapest one that
+# still delivers PROBE_TARGET_FPS is used
+CAMERA_PROBE_ON_START = False
+PROBE_TARGET_FPS = 15
+PROBE_WARMUP_FRAMES = 5
+PROBE_FRAMES = 30
+
+# Frame pacing: target analysis rate per mode
+FACE_MODE_FPS = 15
+GESTURE_MODE_FPS = 20
+FPS_REPORT_INTERVAL = 2.0
+
+# Face ROI tracking: FaceMesh sees a padded square crop around the last known
+# face, resized to ROI_INPUT_SIZE pixels
+ROI_PADDING = 0.25
+ROI_INPUT_SIZE = 256
+
+# Presence cascade: while nobody is in view only the face detector runs, at
+# PRESENCE_CHECK_FPS. FaceMesh takes over after PRESENCE_CONFIRM_FRAMES
+# detections in a row and hands back after PRESENCE_LOST_FRAMES misses in a row.
+PRESENCE_CHECK_FPS = 2
+PRESENCE_CONFIRM_FRAMES = 2
+PRESENCE_LOST_FRAMES = 3
+
+# Motion gate: FaceMesh is skipped and the last landmarks reused while a
+# MOTION_GATE_SIZE grayscale thumbnail of the face region stays within
+# MOTION_PIXEL_DELTA gray levels of the one the landmarks came from on all but
+# MOTION_CHANGED_FRACTION of its pixels. Counting changed pixels rather than
+# averaging the difference keeps a blink, which only touches the eyes, from
+# being missed. Landmarks are never reused for longer than MOTION_MAX_STALENESS
+# seconds.
+MOTION_GATE_ENABLED = True
+MOTION_GATE_SIZE = 64
+MOTION_PIXEL_DELTA = 12
+MOTION_CHANGED_FRACTION = 0.004
+MOTION_MAX_STALENESS = 1.0
+
+# Keyframe mode: with KEYFRAME_INTERVAL above 1, FaceMesh only runs on every
+# Nth frame and the frames in between follow FLOW_POINTS with Lucas-Kanade
+# optical flow, at KEYFRAME_MODE_FPS. A constant-velocity Kalman filter
+# smooths those points; its noise levels are in pixels and pixels/s^2.
+KEYFRAME_INTERVAL = 1
+KEYFRAME_MODE_FPS = 30
+FLOW_WINDOW = 15
+FLOW_PYRAMID_LEVELS = 2
+FLOW_MAX_ERROR = 20.0
+KALMAN_ACCELERATION_STD = 1000.0
+KALMAN_MODEL_NOISE = 1.0
+KALMAN_FLOW_NOISE = 4.0
+
+# High-rate blink tracking: on every captured frame (the camera's 30-60 Hz)
+# both eyes are cropped around their last known position, padded by
+# EYE_CROP_PADDING of the eye width and resized to EYE_CROP_SIZE (w, h)
+# grayscale, and an open-eye template is searched for up to EYE_SEARCH_MARGIN
+# of the crop size away. Landmarks are matched with the positions the eyes
+# were followed to on the last EYE_HISTORY_FRAMES frames by capture time;
+# while the eyes are shut the crops keep moving at the eyes' velocity,
+# smoothed by EYE_VELOCITY_SMOOTHING. FaceMesh frames whose eyelid gap is
+# above EYE_OPEN_FRACTION (below EYE_CLOSED_FRACTION) of its median over the
+# last EYE_CALIBRATION_WINDOW frames calibrate the template and the
+# closed-eye threshold, and the tracker times blinks once
+# EYE_CALIBRATION_FRAMES open frames have been seen. Without closed frames
+# the threshold sits EYE_CLOSED_SIGMA deviations (at least
+# EYE_MIN_SCORE_MARGIN) above the open-eye score; eyes count as open again
+# EYE_HYSTERESIS of the way back. Without the tracker, or until it is
+# calibrated, blinks come from the same eyelid gap over eye width on each
+# face frame: shut at EYE_CLOSED_FRACTION of its median, open again at
+# EYE_OPEN_FRACTION, with no blink figures before EYE_CALIBRATION_FRAMES
+# face frames have set the median.
+EYE_TRACKER_ENABLED = True
+EYE_CROP_SIZE = (32, 16)
+EYE_CROP_PADDING = 0.2
+EYE_SEARCH_MARGIN = 0.25
+EYE_HISTORY_FRAMES = 30
+EYE_VELOCITY_SMOOTHING = 0.5
+EYE_CALIBRATION_WINDOW = 90
+EYE_CALIBRATION_FRAMES = 10
+EYE_CALIBRATION_RATE = 0.1
+EYE_OPEN_FRACTION = 0.8
+EYE_CLOSED_FRACTION = 0.5
+EYE_CLOSED_SIGMA = 4.0
+EYE_MIN_SCORE_MARGIN = 0.1
+EYE_HYSTERESIS = 0.25
+
+# Face landmark indices: nose tip, inner eye corners, upper and lower eyelids
+GEOMETRY_POINTS = [1, 133, 362]
+EYE_TOP_POINTS = [159, 386]
+EYE_BOTTOM_POINTS = [145, 374]
+EYE_OUTER_POINTS = [33, 263]
+# Every point the geometry above reads, followed between keyframes
+FLOW_POINTS = GEOMETRY_POINTS + EYE_TOP_POINTS + EYE_BOTTOM_POINTS + EYE_OUTER_POINTS
+# Outer corner, inner corner, upper and lower eyelid of each eye, for the eye tracker
+EYE_TRACKER_POINTS = [33, 133, 159, 145, 263, 362, 386, 374]
+
+# Landmark inference in worker processes (0 keeps the models in this process)
+INFERENCE_WORKERS = 0
+INFERENCE_SLOTS_PER_WORKER = 2
+INFERENCE_KINDS = ("face", "hands", "presence")
+# Seconds to wait for a worker's answer before treating the frame as having no
+# landmarks (the first request also loads the model)
+INFERENCE_RESULT_TIMEOUT = 10
+
+# Latency instrumentation: samples kept per stage for p50/p95/p99 reporting
+LATENCY_WINDOW = 1024
+
+# Per-frame metrics kept for progress tracking, in a preallocated ring of
+# METRICS_CAPACITY rows (four hours at the face mode rate); once it is full
+# the oldest rows are overwritten. The geometry columns are NaN on frames
+# without face measurements.
+METRICS_CAPACITY = 4 * 60 * 60 * FACE_MODE_FPS
+METRICS_DTYPE = np.dtype([
+    ("time", np.float64), ("face", np.bool_), ("playing", np.bool_),
+    ("normalized_distance", np.float32), ("norm_horizontal_tilt", np.float32), ("norm_vertical_tilt", np.float32),
+    ("nose_displacement", np.float32), ("eye_height", np.float32), ("head_tilt", np.float32),
+])
+# Columns copied from FaceGeometry, and the CSV format of every column
+METRICS_GEOMETRY_FIELDS = METRICS_DTYPE.names[3:]
+METRICS_CSV_FORMAT = ["%.3f", "%d", "%d"] + ["%.6g"] * len(METRICS_GEOMETRY_FIELDS)
+
+# Offline replay
+REPLAY_DEFAULT_FPS = 30
+REPLAY_FRAME_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Serve mode: headless monitoring of several cameras or video files that share
+# one inference worker pool of SERVE_INFERENCE_WORKERS processes (up to the
+# CPU count) unless INFERENCE_WORKERS is set. Adding streams adds no workers
+# and no models. Each stream's status is printed every SERVE_REPORT_INTERVAL
+# seconds.
+SERVE_INFERENCE_WORKERS = 2
+SERVE_REPORT_INTERVAL = 5.0
+
+# Monitoring state. Each session has its own stop event, so a new session
+# never depends on an old one noticing the monitoring flag. A restart waits
+# for the previous session to finish shutting down, checking every
+# MONITOR_RESTART_POLL ms.
+MONITOR_RESTART_POLL = 100
 monitoring = False
 monitor_thread = None
-close_popup_shown = False
+monitor_stop = None
+monitor_timers = None
+monitor_metrics = None
+inference_pool = None
+
+# Control mode: "face", "gesture" or "combined" (face and gesture tracking together)
+CONTROL_MODES = ("face", "gesture", "combined")
+CONTROL_MODE_LABELS = {"face": "Face Detection", "gesture": "Gesture", "combined": "Face + Gesture"}
+control_mode = "face"
 
-# Control mode
-use_gestures = False
+# Combined mode: share of one CPU core the landmark models may use between
+# them, and the lowest rate either model is throttled to
+INFERENCE_CPU_BUDGET = 0.5
+MIN_MODEL_FPS = 2
 
 # Strict Mode and Break Alert variables
 strict_mode = False
-away_time = 0
-AWAY_ALERT_THRESHOLD = 10
+# Seconds spent looking away before a strict-mode alert. The old loop counted
+# 10 frames at roughly 0.11 s each (a 0.1 s sleep plus inference)
+AWAY_ALERT_THRESHOLD = 1.1
+
+# Seconds to ignore further pinch gestures after one toggles playback
+GESTURE_COOLDOWN = 0.3
 
 # Additional thresholds for face distance monitoring
 CLOSE_THRESHOLD = 0.0001
 FAR_THRESHOLD = 0.0
 JUST_RIGHT_THRESHOLD = (CLOSE_THRESHOLD + FAR_THRESHOLD) / 2
 
-# Drowsiness monitoring variables
-last_blink_start = 0
-last_drowsy_alert = 0
-eyes_closed = False
-drowsiness_detected = False
-blink_count = 0
-blink_start_time = 0
+# Blinks per minute above which the blink rate counts as high
 BLINKS_THRESHOLD = 30
-blink_times = []
+# Window (seconds) for blink rate, PERCLOS and mean blink duration
+BLINK_WINDOW = 60
+
+# Status label text colors per analyzer state
+DISTANCE_STATUS_COLORS = {"Too Close": "red", "Too Far": "orange", "Just Right": "green", "No Face Detected": "gray"}
+DROWSINESS_STATUS_COLORS = {"High Blink Rate": "red", "Drowsy": "red", "Alert": "green", "No Face Detected": "gray"}
+
+# Alert popups are queued from any thread and shown on the Tk main thread,
+# which drains the queue every ALERT_POLL_INTERVAL ms. Each alert type
+# (title) is shown at most once per ALERT_RATE_LIMITS seconds.
+ALERT_POLL_INTERVAL = 100
+ALERT_RATE_LIMITS = {"Drowsiness Alert": 20, "Focus Alert": 5, "Too Close": 10, "Error": 5}
+ALERT_DEFAULT_RATE_LIMIT = 5
+alert_dispatcher = None
+
+# Status labels are refreshed from the latest published snapshot every
+# UI_REFRESH_INTERVAL ms on the Tk main thread
+UI_REFRESH_INTERVAL = 100
 
 # Set appearance mode and default color theme
 ctk.set_appearance_mode("system")
 ctk.set_default_color_theme("blue")
 
 class AIAssistant:
+    # Listens on one thread and transcribes on others, so the microphone keeps
+    # capturing while Whisper decodes; see VOICE_QUEUE_SIZE. Utterances are
+    # numbered as they are captured, and transcripts wait in finished until
+    # every earlier one has run, so commands run in capture order under
+    # dispatch_lock. timers holds the time utterances wait in the queue and
+    # the time they take to transcribe.
     def __init__(self):
         self.current_video_url = None
         self.notes = []
         self.is_listening = False
         self.listen_thread = None
+        self.transcribe_threads = []
+        self.timers = StageTimers()
+        self.captured_utterances = 0
+        self.dropped_utterances = 0
+        self.max_queue_depth = 0
+        self.dispatch_lock = threading.Lock()
+        self.finished = {}
+        self.next_dispatch = 0
+    
+    @property
+    def queue_depth(self):
+        return voice_command_queue.qsize()
     
     def start_listening(self):
         self.is_listening = True
         self.listen_thread = threading.Thread(target=self._listen_for_commands, daemon=True)
         self.listen_thread.start()
+        self.transcribe_threads = [threading.Thread(target=self._transcribe_commands, name=f"transcribe {index}",
+                                                    daemon=True)
+                                   for index in range(VOICE_TRANSCRIBE_WORKERS)]
+        for thread in self.transcribe_threads:
+            thread.start()
     
     def stop_listening(self):
         self.is_listening = False
         if self.listen_thread:
             self.listen_thread.join()
+        for thread in self.transcribe_threads:
+            thread.join()
+        # Utterances still waiting are from before the assistant was turned off
+        while True:
+            try:
+                voice_command_queue.get_nowait()
+            except queue.Empty:
+                break
+        print(f"Voice commands: {self.captured_utterances} captured, {self.dropped_utterances} dropped, "
+              f"peak queue depth {self.max_queue_depth}")
+        print(self.timers.report())
     
     def _listen_for_commands(self):
         with sr.Microphone() as source:
@@ -89,36 +386,72 @@ class AIAssistant:
             while self.is_listening:
                 try:
                     audio = recognizer.listen(source, timeout=1, phrase_time_limit=10)
-                    # Convert audio to WAV file
-                    with open("temp_audio.wav", "wb") as f:
-                        f.write(audio.get_wav_data())
-                    
-                    # Process with Whisper and correctly handle the output
-                    segments, _ = whisper_model.transcribe("temp_audio.wav")
-                    command = " ".join([segment.text for segment in segments]).lower().strip()
-                    print(f"Recognized command: {command}")  # Debug output
-                    
-                    # Clean up temporary file
-                    if os.path.exists("temp_audio.wav"):
-                        os.remove("temp_audio.wav")
-                    
-                    if "take note" in command or "make note" in command:
-                        self._process_note_command(command)
-                    elif "save notes" in command:
-                        self._save_notes()
-                    elif "start video" in command:
-                        self._extract_video_url(command)
                 except sr.WaitTimeoutError:
                     continue
+                except Exception as e:
+                    print(f"Error capturing command: {str(e)}")
+                    continue
+                self._enqueue((audio, time.perf_counter(), self.captured_utterances))
+                self.captured_utterances += 1
+    
+    def _enqueue(self, item):
+        # Makes room by dropping the oldest waiting utterance when the queue is full
+        while True:
+            try:
+                voice_command_queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    _, _, dropped = voice_command_queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.dropped_utterances += 1
+                print("Voice command queue full, dropped the oldest utterance")
+                # Later commands must not wait for it
+                self._dispatch(dropped, None)
+        self.max_queue_depth = max(self.max_queue_depth, voice_command_queue.qsize())
+    
+    def _transcribe_commands(self):
+        while self.is_listening:
+            try:
+                audio, captured_at, sequence = voice_command_queue.get(timeout=VOICE_QUEUE_POLL)
+            except queue.Empty:
+                continue
+            self.timers.record("voice.queue_wait", time.perf_counter() - captured_at)
+            command = None
+            try:
+                # Process with Whisper and correctly handle the output
+                start = time.perf_counter()
+                segments, _ = whisper_model.get().transcribe(audio_to_array(audio))
+                command = " ".join([segment.text for segment in segments]).lower().strip()
+                self.timers.record("voice.transcribe", time.perf_counter() - start)
+                print(f"Recognized command: {command}")  # Debug output
+            except Exception as e:
+                print(f"Error processing command: {str(e)}")
+            self._dispatch(sequence, command)
+    
+    def _dispatch(self, sequence, command):
+        # Records the transcript of utterance number sequence (None when there
+        # is nothing to run) and runs every command whose turn has come
+        with self.dispatch_lock:
+            self.finished[sequence] = command
+            while self.next_dispatch in self.finished:
+                command = self.finished.pop(self.next_dispatch)
+                self.next_dispatch += 1
+                if command is None:
+                    continue
+                try:
+                    self._run_command(command)
                 except Exception as e:
                     print(f"Error processing command: {str(e)}")
-                    
-                # Additional cleanup
-                if os.path.exists("temp_audio.wav"):
-                    try:
-                        os.remove("temp_audio.wav")
-                    except:
-                        pass
+    
+    def _run_command(self, command):
+        if "take note" in command or "make note" in command:
+            self._process_note_command(command)
+        elif "save notes" in command:
+            self._save_notes()
+        elif "start video" in command:
+            self._extract_video_url(command)
     
     def _process_note_command(self, command):
         note_content = re.sub(r'^(take note|make note)\s*', '', command, flags=re.IGNORECASE)
@@ -156,191 +489,1990 @@ class AIAssistant:
     def get_current_notes(self):
         return self.notes
 
-def init_camera():
-    global cap
+class LatencyHistogram:
+    # Rolling window of the last LATENCY_WINDOW samples (seconds) for one stage
+    def __init__(self, size=LATENCY_WINDOW):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+    
+    def record(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % len(self.samples)
+        if self.count < len(self.samples):
+            self.count += 1
+    
+    def percentiles(self, quantiles=(50, 95, 99)):
+        if self.count == 0:
+            return [0.0] * len(quantiles)
+        return np.percentile(self.samples[:self.count], quantiles)
+
+class StageTimers:
+    # Per-stage latency histograms, cheap enough to record on every frame
+    def __init__(self):
+        self.stages = {}
+    
+    def record(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.record(seconds)
+    
+    def report(self):
+        lines = [f"{'stage':<20}{'samples':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for stage, histogram in list(self.stages.items()):
+            p50, p95, p99 = histogram.percentiles()
+            lines.append(f"{stage:<20}{histogram.count:>8}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}{p99 * 1000:>10.2f}")
+        return "\n".join(lines)
+    
+    def dump(self, filename=None):
+        report = self.report()
+        print(report)
+        if filename is None:
+            filename = f"latency_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(f"Latency stats saved to {filename}")
+        return filename
+
+class MetricsTimeSeries:
+    # Ring buffer of METRICS_DTYPE rows, one per analyzed frame. Appends write
+    # one row in place, so they take constant time and memory stays at
+    # METRICS_CAPACITY rows however long the session runs.
+    def __init__(self, capacity=METRICS_CAPACITY):
+        self.rows = np.zeros(capacity, dtype=METRICS_DTYPE)
+        self.index = 0
+        self.count = 0
+        self.no_geometry = (np.nan,) * len(METRICS_GEOMETRY_FIELDS)
+        # Exports run on the UI thread while frames are still being recorded
+        self.lock = threading.Lock()
+    
+    def record(self, result):
+        geometry = result.geometry
+        values = self.no_geometry if geometry is None else tuple(getattr(geometry, name) for name in METRICS_GEOMETRY_FIELDS)
+        with self.lock:
+            self.rows[self.index] = (result.timestamp, result.face, result.playing) + values
+            self.index = (self.index + 1) % len(self.rows)
+            if self.count < len(self.rows):
+                self.count += 1
+    
+    def snapshot(self):
+        # The recorded rows, oldest first, as a copy
+        with self.lock:
+            if self.count < len(self.rows):
+                return self.rows[:self.count].copy()
+            return np.concatenate((self.rows[self.index:], self.rows[:self.index]))
+    
+    def dump(self, basename=None, rows=None):
+        # Writes <basename>.npy (load with np.load) and <basename>.csv, from
+        # rows taken with snapshot() or a fresh snapshot
+        if rows is None:
+            rows = self.snapshot()
+        if basename is None:
+            basename = f"session_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        np.save(f"{basename}.npy", rows)
+        np.savetxt(f"{basename}.csv", rows, fmt=METRICS_CSV_FORMAT, delimiter=",",
+                   header=",".join(METRICS_DTYPE.names), comments="")
+        print(f"Session metrics ({len(rows)} frames) saved to {basename}.npy and {basename}.csv")
+        return basename
+
+class CaptureProfile:
+    # Backend, resolution, frame rate, pixel format and driver buffer size to
+    # request from the camera. The driver may silently fall back to other values.
+    def __init__(self, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1, backend=DEFAULT_CAPTURE_BACKEND):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.backend = backend
+    
+    def open(self, index=CAMERA_INDEX):
+        capture = cv2.VideoCapture(index, self.backend)
+        if not capture.isOpened() and self.backend != cv2.CAP_ANY:
+            capture = cv2.VideoCapture(index)
+        if not capture.isOpened():
+            return capture
+        # V4L2 only honours the pixel format if it is set before the resolution
+        if self.fourcc:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        capture.set(cv2.CAP_PROP_FPS, self.fps)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return capture
+    
+    def __str__(self):
+        return f"{self.width}x{self.height}@{self.fps} {self.fourcc or 'default'} (buffer {self.buffer_size})"
+
+# Candidate profiles for probing, cheapest first
+CAPTURE_PROFILES = [
+    CaptureProfile(320, 240, 30, "MJPG"),
+    CaptureProfile(640, 480, 30, "MJPG"),
+    CaptureProfile(640, 480, 30, "YUYV"),
+    CaptureProfile(1280, 720, 30, "MJPG"),
+]
+capture_profile = CaptureProfile()
+
+def probe_capture_profile(profile, frames=PROBE_FRAMES):
+    # Measures the frame rate a profile really delivers and the median time
+    # spent in a single read. Returns None if the profile does not work.
+    capture = profile.open()
     try:
-        cap = cv2.VideoCapture(0)
+        if not capture.isOpened():
+            return None
+        for _ in range(PROBE_WARMUP_FRAMES):
+            if not capture.read()[0]:
+                return None
+        
+        read_latencies = []
+        start = time.perf_counter()
+        for _ in range(frames):
+            read_start = time.perf_counter()
+            if not capture.read()[0]:
+                return None
+            read_latencies.append(time.perf_counter() - read_start)
+        elapsed = time.perf_counter() - start
+        
+        read_latencies.sort()
+        return {
+            "fps": frames / elapsed,
+            "read_latency": read_latencies[len(read_latencies) // 2],
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        capture.release()
+
+def negotiate_capture_profile(profiles=CAPTURE_PROFILES, target_fps=PROBE_TARGET_FPS):
+    # Picks the profile with the fewest delivered pixels (then the fastest
+    # read) that still meets target_fps, or None if none of them does
+    best_profile = None
+    best_cost = None
+    for profile in profiles:
+        stats = probe_capture_profile(profile)
+        if stats is None:
+            print(f"Camera profile {profile}: unavailable")
+            continue
+        print(f"Camera profile {profile}: {stats['width']}x{stats['height']} delivered, "
+              f"{stats['fps']:.1f} fps, {stats['read_latency'] * 1000:.1f} ms per read")
+        if stats["fps"] < target_fps:
+            continue
+        cost = (stats["width"] * stats["height"], stats["read_latency"])
+        if best_cost is None or cost < best_cost:
+            best_profile = profile
+            best_cost = cost
+    return best_profile
+
+def init_camera(profile=None, probe=False):
+    global cap, capture_profile
+    try:
+        if probe:
+            negotiated = negotiate_capture_profile()
+            if negotiated is not None:
+                capture_profile = negotiated
+                print(f"Using camera profile {capture_profile}")
+            else:
+                print(f"No camera profile reached {PROBE_TARGET_FPS} fps, using {capture_profile}")
+        elif profile is not None:
+            capture_profile = profile
+        
+        cap = capture_profile.open()
         if not cap.isOpened():
-            CTkMessagebox(title="Error", message="Unable to access webcam.", icon="cancel")
+            post_alert("Error", "Unable to access webcam.", "cancel")
             return False
         return True
     except Exception as e:
-        CTkMessagebox(title="Error", message=f"Camera initialization error: {str(e)}", icon="cancel")
+        post_alert("Error", f"Camera initialization error: {str(e)}", "cancel")
         return False
 
-def detect_gesture(frame):
-    global is_playing
+class AlertDispatcher:
+    # Shows alerts posted from any thread as CTkMessagebox popups on the Tk
+    # main thread. post() never blocks; the main thread drains the queue via
+    # after(). Duplicates of an alert that is waiting or still on screen are
+    # coalesced into it, and ALERT_RATE_LIMITS are applied per title. Delivery
+    # latency (post to popup) is recorded with the monitoring session's timers.
+    def __init__(self, root):
+        self.root = root
+        self.queue = queue.SimpleQueue()
+        self.open_dialogs = {}
+        self.last_shown = {}
+        self.coalesced = 0
+        self.rate_limited = 0
     
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
+    def post(self, title, message, icon="info"):
+        self.queue.put((title, message, icon, time.perf_counter()))
     
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            thumb_tip = hand_landmarks.landmark[4]
-            index_tip = hand_landmarks.landmark[8]
-            
-            distance = ((thumb_tip.x - index_tip.x) ** 2 + 
-                       (thumb_tip.y - index_tip.y) ** 2) ** 0.5
-            
-            if distance < 0.1:
-                if is_playing:
-                    pyautogui.press('k')
-                    is_playing = False
-                    time.sleep(0.3)
+    def start(self):
+        self.root.after(ALERT_POLL_INTERVAL, self._drain)
+    
+    def _drain(self):
+        pending = {}
+        while True:
+            try:
+                title, message, icon, posted = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if (title, message) in pending:
+                self.coalesced += 1
+                continue
+            pending[title, message] = (icon, posted)
+        
+        now = time.perf_counter()
+        for (title, message), (icon, posted) in pending.items():
+            dialog = self.open_dialogs.get(title)
+            if dialog is not None and dialog.winfo_exists():
+                self.coalesced += 1
+                continue
+            if now - self.last_shown.get(title, float("-inf")) < ALERT_RATE_LIMITS.get(title, ALERT_DEFAULT_RATE_LIMIT):
+                self.rate_limited += 1
+                continue
+            self.last_shown[title] = now
+            self.open_dialogs[title] = CTkMessagebox(title=title, message=message, icon=icon)
+            if monitor_timers is not None:
+                monitor_timers.record("alert_delivery", time.perf_counter() - posted)
+        self.root.after(ALERT_POLL_INTERVAL, self._drain)
+
+# Status label values as (text, color) pairs, color None to leave it as is;
+# None fields have not been published yet
+StatusSnapshot = namedtuple("StatusSnapshot", ("distance", "drowsiness", "blinks", "frame_rate", "models"),
+                            defaults=(None,) * 5)
+
+class UIBridge:
+    # Carries status from worker threads to the Tk widgets. Workers publish
+    # by swapping in a new immutable StatusSnapshot; the main thread picks up
+    # the latest one every UI_REFRESH_INTERVAL ms via after() and configures
+    # only the labels whose value changed. How late each refresh fires is
+    # recorded as the main loop's lag.
+    def __init__(self, root, labels):
+        self.root = root
+        self.labels = labels
+        self.snapshot = StatusSnapshot()
+        self.applied = {}
+        self.lock = threading.Lock()
+        self.next_refresh = 0.0
+    
+    def update(self, **changes):
+        # Safe from any thread
+        with self.lock:
+            self.snapshot = self.snapshot._replace(**changes)
+    
+    def start(self):
+        self.next_refresh = time.perf_counter() + UI_REFRESH_INTERVAL / 1000
+        self.root.after(UI_REFRESH_INTERVAL, self._refresh)
+    
+    def _refresh(self):
+        start = time.perf_counter()
+        lag = max(start - self.next_refresh, 0.0)
+        snapshot = self.snapshot
+        for field, value in zip(snapshot._fields, snapshot):
+            if value is None or self.applied.get(field) == value:
+                continue
+            text, color = value
+            if color is None:
+                self.labels[field].configure(text=text)
             else:
-                if not is_playing:
-                    pyautogui.press('k')
-                    is_playing = True
-                    time.sleep(0.3)
-
-def check_drowsiness(landmarks, frame_w, frame_h, current_time):
-    global last_blink_start, last_drowsy_alert, eyes_closed, drowsiness_detected
-    global blink_count, blink_start_time, blink_times
-
-    left_eye_top = landmarks[159]
-    left_eye_bottom = landmarks[145]
-    right_eye_top = landmarks[386]
-    right_eye_bottom = landmarks[374]
-    
-    left_eye_height = abs(left_eye_top.y - left_eye_bottom.y)
-    right_eye_height = abs(right_eye_top.y - right_eye_bottom.y)
-    ear = (left_eye_height + right_eye_height) / 2
-    
-    nose_tip = landmarks[1]
-    left_eye = landmarks[133]
-    right_eye = landmarks[362]
-    head_tilt = abs((left_eye.y - right_eye.y) / (right_eye.x - left_eye.x))
-
-    if not eyes_closed and ear < BLINK_THRESHOLD:
-        eyes_closed = True
-        blink_start_time = current_time
-        blink_times.append(current_time)
-        
-        blink_times = [t for t in blink_times if current_time - t <= 60]
-        blink_count = len(blink_times)
-    
-    elif eyes_closed and ear >= BLINK_THRESHOLD:
-        eyes_closed = False
-        blink_duration = current_time - blink_start_time
-        
-        if blink_duration > DROWSY_BLINK_DURATION:
-            drowsiness_detected = True
-
-    if head_tilt > HEAD_TILT_THRESHOLD:
-        drowsiness_detected = True
-
-    if drowsiness_detected and (current_time - last_drowsy_alert) > DROWSY_ALERT_INTERVAL:
-        CTkMessagebox(title="Drowsiness Alert", 
-                     message="You appear to be drowsy! Consider taking a break.",
-                     icon="warning")
-        last_drowsy_alert = current_time
-        drowsiness_detected = False
-
-    if blink_count > BLINKS_THRESHOLD:
-        app.drowsiness_status_label.configure(text="Drowsiness Status: High Blink Rate", text_color="red")
-    elif drowsiness_detected:
-        app.drowsiness_status_label.configure(text="Drowsiness Status: Drowsy", text_color="red")
-    else:
-        app.drowsiness_status_label.configure(text="Drowsiness Status: Alert", text_color="green")
+                self.labels[field].configure(text=text, text_color=color)
+            self.applied[field] = value
+        if monitor_timers is not None:
+            monitor_timers.record("ui_loop_lag", lag)
+            monitor_timers.record("ui_refresh", time.perf_counter() - start)
+        self.next_refresh = time.perf_counter() + UI_REFRESH_INTERVAL / 1000
+        self.root.after(UI_REFRESH_INTERVAL, self._refresh)
 
-def start_monitoring():
-    global is_playing, monitoring, away_time, close_popup_shown
+def post_alert(title, message, icon="info"):
+    # Safe from any thread; without the app window alerts are printed
+    if alert_dispatcher is not None:
+        alert_dispatcher.post(title, message, icon)
+    else:
+        print(f"{title}: {message}")
 
-    while monitoring:
-        ret, frame = cap.read()
-        if not ret:
-            CTkMessagebox(title="Error", message="Unable to access webcam.", icon="cancel")
-            break
+class FrameGrabber:
+    # Reads the camera on its own thread into a small ring of preallocated
+    # buffers and keeps only the newest frame, so slow inference never leaves
+    # the analysis loop working on stale video.
+    def __init__(self, capture, buffer_size=FRAME_BUFFER_SIZE, timers=None):
+        self.capture = capture
+        self.timers = timers
+        # One extra slot so the writer never touches the newest frame or the
+        # one the analysis loop is still reading
+        self.slots = [None] * (buffer_size + 1)
+        self.timestamps = [0.0] * (buffer_size + 1)
+        self.latest_slot = None
+        self.reading_slot = None
+        self.frame_ready = threading.Condition()
+        self.running = False
+        self.failed = False
+        self.thread = None
+        self.frame_id = 0
+        self.last_read_id = 0
+        self.dropped_frames = 0
+        self.hooks = []
+    
+    def add_hook(self, hook, stage):
+        # hook(frame, timestamp) runs on the capture thread for every frame,
+        # right after it is published; stage names its latency histogram
+        self.hooks.append((hook, stage))
+    
+    def start(self):
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        with self.frame_ready:
+            self.running = False
+            self.frame_ready.notify_all()
+        if self.thread:
+            self.thread.join()
+    
+    def _capture_loop(self):
+        while self.running:
+            with self.frame_ready:
+                slot = next(i for i in range(len(self.slots)) if i not in (self.latest_slot, self.reading_slot))
+            buffer = self.slots[slot]
+            read_start = time.perf_counter()
+            if buffer is None:
+                ret, frame = self.capture.read()
+            else:
+                ret, frame = self.capture.read(image=buffer)
+            timestamp = time.time()
+            if self.timers is not None:
+                self.timers.record("cap.read", time.perf_counter() - read_start)
+            with self.frame_ready:
+                if not ret:
+                    self.failed = True
+                    self.running = False
+                    self.frame_ready.notify_all()
+                    break
+                # read() allocates a new array when the buffer shape does not fit
+                self.slots[slot] = frame
+                self.timestamps[slot] = timestamp
+                self.latest_slot = slot
+                self.frame_id += 1
+                self.frame_ready.notify_all()
+            # The next read goes to another slot, so the frame stays intact
+            # until the hooks are done
+            for hook, stage in self.hooks:
+                hook_start = time.perf_counter()
+                hook(frame, timestamp)
+                if self.timers is not None:
+                    self.timers.record(stage, time.perf_counter() - hook_start)
+    
+    def read_latest(self, timeout=FRAME_WAIT_TIMEOUT):
+        # Returns the newest unseen frame and its capture time, or (None, None)
+        # if nothing arrived in time or the capture thread has stopped. The
+        # frame stays valid until the next call.
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.frame_id > self.last_read_id or not self.running, timeout)
+            if self.frame_id <= self.last_read_id:
+                return None, None
+            self.dropped_frames += self.frame_id - self.last_read_id - 1
+            self.last_read_id = self.frame_id
+            self.reading_slot = self.latest_slot
+            return self.slots[self.reading_slot], self.timestamps[self.reading_slot]
 
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        current_time = time.time()
+class FramePreparer:
+    # Mirrors each frame and converts it to RGB exactly once, into buffers
+    # that are reused across frames. Every consumer shares the same RGB view.
+    def __init__(self):
+        self.bgr_frame = None
+        self.rgb_frame = None
+    
+    def prepare(self, frame):
+        if self.bgr_frame is None or self.bgr_frame.shape != frame.shape:
+            self.bgr_frame = np.empty_like(frame)
+            self.rgb_frame = np.empty_like(frame)
+        cv2.flip(frame, 1, dst=self.bgr_frame)
+        cv2.cvtColor(self.bgr_frame, cv2.COLOR_BGR2RGB, dst=self.rgb_frame)
+        return self.bgr_frame, self.rgb_frame
 
-        if use_gestures:
-            detect_gesture(frame)
+class FrameScheduler:
+    # Paces the analysis loop: sleeps only for what is left of the frame
+    # budget and measures the frame rate actually achieved.
+    def __init__(self, target_fps=FACE_MODE_FPS):
+        self.target_fps = target_fps
+        self.next_frame_time = time.perf_counter()
+        self.window_start = self.next_frame_time
+        self.window_frames = 0
+        self.achieved_fps = 0.0
+    
+    def set_target_fps(self, target_fps):
+        if target_fps != self.target_fps:
+            self.target_fps = target_fps
+            self.next_frame_time = time.perf_counter()
+    
+    def wait(self):
+        # Returns True whenever a fresh achieved_fps value is available
+        now = time.perf_counter()
+        self.next_frame_time += 1.0 / self.target_fps
+        if self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
         else:
-            result = face_mesh.process(rgb_frame)
-            frame_h, frame_w, _ = frame.shape
+            # Running behind: start a new budget instead of trying to catch up
+            self.next_frame_time = now
+        
+        self.window_frames += 1
+        now = time.perf_counter()
+        if now - self.window_start >= FPS_REPORT_INTERVAL:
+            self.achieved_fps = self.window_frames / (now - self.window_start)
+            self.window_start = now
+            self.window_frames = 0
+            return True
+        return False
 
+class FaceROITracker:
+    # Works out the face bounding box from the previous landmarks and runs
+    # FaceMesh on a downscaled crop around it, falling back to the full frame
+    # whenever tracking is lost. Landmarks come back as an (N, 3) array in
+    # full-frame normalized coordinates.
+    def __init__(self, input_size=ROI_INPUT_SIZE, padding=ROI_PADDING):
+        self.input_size = input_size
+        self.padding = padding
+        self.roi = None
+        self.crop_frame = np.empty((input_size, input_size, 3), dtype=np.uint8)
+    
+    def reset(self):
+        self.roi = None
+    
+    def process(self, full_mesh, roi_mesh, rgb_frame):
+        frame_h, frame_w, _ = rgb_frame.shape
+        
+        if self.roi is not None:
+            x0, y0, size = self.roi
+            crop = rgb_frame[y0:y0 + size, x0:x0 + size]
+            interpolation = cv2.INTER_AREA if size > self.input_size else cv2.INTER_LINEAR
+            cv2.resize(crop, (self.input_size, self.input_size), dst=self.crop_frame, interpolation=interpolation)
+            result = roi_mesh.process(self.crop_frame)
+            
             if result.multi_face_landmarks:
-                landmarks = result.multi_face_landmarks[0].landmark
-                
-                check_drowsiness(landmarks, frame_w, frame_h, current_time)
-
-                left_eye = landmarks[133]
-                right_eye = landmarks[362]
-                
-                left_eye_x, left_eye_y = int(left_eye.x * frame_w), int(left_eye.y * frame_h)
-                right_eye_x, right_eye_y = int(right_eye.x * frame_w), int(right_eye.y * frame_h)
-                
-                eye_distance = ((right_eye_x - left_eye_x) ** 2 + (right_eye_y - left_eye_y) ** 2) ** 0.5
-                
-                min_x = min([landmark.x for landmark in landmarks])
-                max_x = max([landmark.x for landmark in landmarks])
-                min_y = min([landmark.y for landmark in landmarks])
-                max_y = max([landmark.y for landmark in landmarks])
-                
-                face_size = ((max_x - min_x) * frame_w) * ((max_y - min_y) * frame_h)
-                estimated_distance = (eye_distance ** 2) / face_size
-                normalized_distance = estimated_distance / frame_w
-
-                if normalized_distance > CLOSE_THRESHOLD:
-                    app.distance_status_label.configure(text="Distance Status: Too Close", text_color="red")
-                    if not close_popup_shown:
-                        CTkMessagebox(title="Too Close", message="You are too close to the screen. Please move back!", icon="warning")
-                        close_popup_shown = True
-                elif normalized_distance < FAR_THRESHOLD:
-                    app.distance_status_label.configure(text="Distance Status: Too Far", text_color="orange")
-                elif FAR_THRESHOLD <= normalized_distance <= CLOSE_THRESHOLD:
-                    app.distance_status_label.configure(text="Distance Status: Just Right", text_color="green")
-                    close_popup_shown = False
-
-                nose_tip = landmarks[1]
-                left_eye_inner = landmarks[133]
-                right_eye_inner = landmarks[362]
-
-                nose_x = int(nose_tip.x * frame_w)
-                nose_y = int(nose_tip.y * frame_h)
-                left_x = int(left_eye_inner.x * frame_w)
-                left_y = int(left_eye_inner.y * frame_h)
-                right_x = int(right_eye_inner.x * frame_w)
-                right_y = int(right_eye_inner.y * frame_h)
-
-                horizontal_tilt = (left_x + right_x) / 2 - nose_x
-                vertical_tilt = (left_y + right_y) / 2 - nose_y
-                norm_horizontal_tilt = horizontal_tilt / frame_w
-                norm_vertical_tilt = vertical_tilt / frame_h
-                eyes_midpoint_x = (left_x + right_x) / 2
-                nose_displacement = (nose_x - eyes_midpoint_x) / frame_w
-
-                if (abs(norm_horizontal_tilt) > LOOK_THRESHOLD or 
-                    abs(norm_vertical_tilt) > LOOK_THRESHOLD or 
-                    abs(nose_displacement) > SIDE_LOOK_THRESHOLD):
-                    
-                    if strict_mode:
-                        away_time += 1
-                        if away_time > AWAY_ALERT_THRESHOLD:
-                            CTkMessagebox(title="Focus Alert", message="You've been looking away for too long. Time to refocus!", icon="info")
-                            away_time = 0
-                    
-                    if is_playing:
-                        pyautogui.press('k')
-                        is_playing = False
-                else:
-                    away_time = 0
-                    if not is_playing:
-                        pyautogui.press('k')
-                        is_playing = True
+                # Map crop-relative landmarks back to full-frame coordinates
+                points = landmarks_to_array(result.multi_face_landmarks[0].landmark)
+                points[:, 0] = (x0 + points[:, 0] * size) / frame_w
+                points[:, 1] = (y0 + points[:, 1] * size) / frame_h
+                points[:, 2] *= size / frame_w
+                self._update_roi(points, frame_w, frame_h)
+                return points
+            self.roi = None
+        
+        result = full_mesh.process(rgb_frame)
+        if not result.multi_face_landmarks:
+            return None
+        points = landmarks_to_array(result.multi_face_landmarks[0].landmark)
+        self._update_roi(points, frame_w, frame_h)
+        return points
+    
+    def _update_roi(self, points, frame_w, frame_h):
+        min_x, min_y = points[:, :2].min(axis=0) * (frame_w, frame_h)
+        max_x, max_y = points[:, :2].max(axis=0) * (frame_w, frame_h)
+        
+        size = int(max(max_x - min_x, max_y - min_y) * (1 + 2 * self.padding))
+        size = min(size, frame_w, frame_h)
+        if size <= 0:
+            self.roi = None
+            return
+        center_x = (min_x + max_x) / 2
+        center_y = (min_y + max_y) / 2
+        x0 = int(min(max(center_x - size / 2, 0), frame_w - size))
+        y0 = int(min(max(center_y - size / 2, 0), frame_h - size))
+        self.roi = (x0, y0, size)
+
+def landmarks_to_array(landmarks):
+    # The only per-landmark Python loop in a frame; every detector downstream
+    # works on the resulting contiguous (N, 3) float32 array
+    return np.array([(landmark.x, landmark.y, landmark.z) for landmark in landmarks], dtype=np.float32)
+
+class FaceGeometry:
+    # Distance, tilt and eye measurements derived from one landmark array
+    __slots__ = ("face_size", "eye_distance", "normalized_distance", "eye_height", "eye_openness", "head_tilt",
+                 "norm_horizontal_tilt", "norm_vertical_tilt", "nose_displacement")
+    
+    def __init__(self, points, frame_w, frame_h):
+        frame_scale = np.array((frame_w, frame_h), dtype=np.float32)
+        face_w, face_h = (points[:, :2].max(axis=0) - points[:, :2].min(axis=0)) * frame_scale
+        self.face_size = float(face_w * face_h)
+        
+        # Nose tip and inner eye corners in whole pixels, as the thresholds were tuned on
+        nose, left_eye, right_eye = (points[GEOMETRY_POINTS, :2] * frame_scale).astype(np.int32)
+        self.eye_distance = float(np.hypot(*(right_eye - left_eye)))
+        self.normalized_distance = (self.eye_distance ** 2) / self.face_size / frame_w
+        
+        eye_heights = np.abs(points[EYE_TOP_POINTS, 1] - points[EYE_BOTTOM_POINTS, 1])
+        self.eye_height = float(eye_heights.mean())
+        # Eyelid gap over eye width, as the eye tracker labels frames
+        eye_widths = np.abs(points[GEOMETRY_POINTS[1:], 0] - points[EYE_OUTER_POINTS, 0])
+        self.eye_openness = float((eye_heights / np.maximum(eye_widths, 1e-6)).mean())
+        inner_eyes = points[GEOMETRY_POINTS[1:], :2]
+        self.head_tilt = float(abs((inner_eyes[0, 1] - inner_eyes[1, 1]) / (inner_eyes[1, 0] - inner_eyes[0, 0])))
+        
+        horizontal_tilt, vertical_tilt = (left_eye + right_eye) / 2 - nose
+        self.norm_horizontal_tilt = float(horizontal_tilt / frame_w)
+        self.norm_vertical_tilt = float(vertical_tilt / frame_h)
+        self.nose_displacement = -self.norm_horizontal_tilt
+
+def hands_to_array(multi_hand_landmarks):
+    # (hands, 21, 3) float32 array, or None when no hand was found
+    if not multi_hand_landmarks:
+        return None
+    return np.stack([landmarks_to_array(hand.landmark) for hand in multi_hand_landmarks])
+
+class LocalLandmarker:
+    # Runs the MediaPipe models in this process. last_costs holds the latest
+    # inference time per model for the combined-mode budget.
+    def __init__(self):
+        self.roi_tracker = FaceROITracker()
+        self.last_costs = {"face": 0.0, "hands": 0.0, "presence": 0.0}
+        self.hands_executor = None
+    
+    def detect_presence(self, rgb_frame, key=None):
+        start = time.perf_counter()
+        found = bool(face_detector.get().process(rgb_frame).detections)
+        self.last_costs["presence"] = time.perf_counter() - start
+        return found
+    
+    def detect_face(self, rgb_frame, key=None):
+        start = time.perf_counter()
+        points = self.roi_tracker.process(face_mesh.get(), face_mesh_roi.get(), rgb_frame)
+        self.last_costs["face"] = time.perf_counter() - start
+        return points
+    
+    def reset_face(self, key=None):
+        # Forgets where the face was, for when face tracking resumes after a
+        # pause; FaceMesh would otherwise search where the face used to be
+        self.roi_tracker.reset()
+        for model in (face_mesh, face_mesh_roi):
+            if model.ready:
+                model.get().reset()
+    
+    def detect_hands(self, rgb_frame, key=None):
+        start = time.perf_counter()
+        hand_points = hands_to_array(hands.get().process(rgb_frame).multi_hand_landmarks)
+        self.last_costs["hands"] = time.perf_counter() - start
+        return hand_points
+    
+    def detect_face_and_hands(self, rgb_frame, key=None):
+        # Hands run on a helper thread while FaceMesh runs here; MediaPipe
+        # releases the GIL while its graph is busy
+        if self.hands_executor is None:
+            self.hands_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hands")
+        hands_future = self.hands_executor.submit(self.detect_hands, rgb_frame, key)
+        points = self.detect_face(rgb_frame, key)
+        return points, hands_future.result()
+    
+    def close(self):
+        # Called when the session that created this landmarker ends
+        if self.hands_executor is not None:
+            self.hands_executor.shutdown()
+            self.hands_executor = None
+
+class SharedFrameRing:
+    # Fixed number of RGB frame slots in one shared memory block, so frames
+    # reach the inference workers without being pickled
+    def __init__(self, frame_shape, slots, name=None):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        if name is None:
+            size = slots * int(np.prod(self.frame_shape))
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            # Workers are spawned from this process and share its resource
+            # tracker, so the block is unlinked exactly once, by the owner
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.memory.name
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self.memory.buf)
+    
+    def close(self):
+        self.frames = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+def _inference_worker(request_queue, response_pipe):
+    # Owns its own models; receives (request_id, kind, key, ring name,
+    # frame shape, slot count, slot) and answers on its own pipe with
+    # (request_id, landmarks, inference seconds). Presence requests answer
+    # with a bool instead of landmarks; reset requests forget the key's face
+    # ROI and get no answer. FaceMesh and Hands run in static image mode, so
+    # they keep nothing between frames and one instance of each serves every
+    # key; what a stream does carry over, its face ROI, lives in the
+    # FaceROITracker kept for its key. The face detector is stateless as well.
+    worker_mesh = None
+    worker_hands = None
+    detector = None
+    roi_trackers = {}
+    # The parent's rings by name, one per frame shape, attached on first use
+    rings = {}
+    # Ctrl+C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    while True:
+        request = request_queue.get()
+        if request is None:
+            break
+        request_id, kind, key, ring_name, frame_shape, slots, slot = request
+        if kind == "reset":
+            roi_trackers.pop(key, None)
+            continue
+        landmarks = None
+        start = time.perf_counter()
+        try:
+            if ring_name not in rings:
+                rings[ring_name] = SharedFrameRing(frame_shape, slots, name=ring_name)
+            rgb_frame = rings[ring_name].frames[slot]
+            
+            if kind == "face":
+                if worker_mesh is None:
+                    worker_mesh = create_face_mesh(static_image_mode=True)
+                tracker = roi_trackers.setdefault(key, FaceROITracker())
+                landmarks = tracker.process(worker_mesh, worker_mesh, rgb_frame)
+            elif kind == "presence":
+                if detector is None:
+                    detector = create_face_detector()
+                landmarks = bool(detector.process(rgb_frame).detections)
             else:
-                app.distance_status_label.configure(text="Distance Status: No Face Detected", text_color="gray")
-                app.drowsiness_status_label.configure(text="Drowsiness Status: No Face Detected", text_color="gray")
+                if worker_hands is None:
+                    worker_hands = create_hands(static_image_mode=True)
+                landmarks = hands_to_array(worker_hands.process(rgb_frame).multi_hand_landmarks)
+        except Exception as e:
+            print(f"Inference worker error: {str(e)}")
+        response_pipe.send((request_id, landmarks, time.perf_counter() - start))
+    
+    for ring in rings.values():
+        ring.close()
 
-        time.sleep(0.1)
+class ProcessPoolLandmarker:
+    # Runs the landmark models in worker processes. Frames travel through a
+    # SharedFrameRing, one per frame shape so streams of different sizes
+    # share the pool without replacing each other's ring, and only landmark
+    # arrays come back. Requests with the same kind and key always go to the
+    # same worker so the key's face ROI stays with it, and face and hands
+    # requests for one key land on different workers so they can run in
+    # parallel.
+    def __init__(self, workers=INFERENCE_WORKERS, slots_per_worker=INFERENCE_SLOTS_PER_WORKER):
+        context = multiprocessing.get_context("spawn")
+        self.slots = workers * slots_per_worker
+        self.request_queues = [context.Queue() for _ in range(workers)]
+        # One response pipe per worker rather than a shared queue, whose lock
+        # a worker killed mid-answer would take with it. The pipe closes when
+        # its worker exits, however it exits.
+        self.response_pipes = []
+        self.processes = []
+        for request_queue in self.request_queues:
+            reader, writer = context.Pipe(duplex=False)
+            process = context.Process(target=_inference_worker, args=(request_queue, writer), daemon=True)
+            process.start()
+            writer.close()
+            self.response_pipes.append(reader)
+            self.processes.append(process)
+        
+        # Ring and free slots per frame shape; a request holds (shape, slot)
+        self.rings = {}
+        self.free_slots = {}
+        self.request_slots = {}
+        self.request_kinds = {}
+        self.request_workers = {}
+        self.responses = {}
+        # Timed-out requests whose slot stays reserved until the late answer
+        # arrives, and workers that have exited
+        self.abandoned = set()
+        self.dead_workers = set()
+        self.last_costs = {"face": 0.0, "hands": 0.0, "presence": 0.0}
+        self.next_request_id = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.collector = threading.Thread(target=self._collect_responses, daemon=True)
+        self.collector.start()
+    
+    def _collect_responses(self):
+        # Runs until every worker has exited
+        pipes = list(self.response_pipes)
+        while pipes:
+            for pipe in multiprocessing.connection.wait(pipes):
+                try:
+                    request_id, landmarks, seconds = pipe.recv()
+                except EOFError:
+                    pipes.remove(pipe)
+                    self._worker_exited(self.response_pipes.index(pipe))
+                    continue
+                with self.condition:
+                    self.last_costs[self.request_kinds[request_id]] = seconds
+                    self._release(request_id)
+                    if request_id in self.abandoned:
+                        self.abandoned.discard(request_id)
+                    else:
+                        self.responses[request_id] = landmarks
+                    self.condition.notify_all()
+    
+    def _worker_exited(self, worker):
+        # Every answer the worker sent has been read, so nothing more will
+        # come: its requests give no landmarks and their slots are free again
+        with self.condition:
+            self.dead_workers.add(worker)
+            for request_id in [r for r, w in self.request_workers.items() if w == worker]:
+                self.abandoned.discard(request_id)
+                self._release(request_id)
+            self.condition.notify_all()
+        if not self.closed:
+            post_alert("Error", f"Inference worker {worker} stopped; its frames get no landmarks.", "cancel")
+    
+    def _release(self, request_id):
+        # Called with the condition held, once the request's slot can be reused
+        frame_shape, slot = self.request_slots.pop(request_id)
+        self.free_slots[frame_shape].append(slot)
+        self.request_kinds.pop(request_id)
+        self.request_workers.pop(request_id)
+    
+    def submit(self, kind, rgb_frame, key=None):
+        # Copies the frame into a free slot of its shape's ring and returns a
+        # request id for result()
+        with self.condition:
+            request_id = self.next_request_id
+            self.next_request_id += 1
+            worker = self._worker(kind, key)
+            if worker in self.dead_workers:
+                # Nothing would answer; result() gives None for it
+                return request_id
+            frame_shape = rgb_frame.shape
+            if frame_shape not in self.rings:
+                self.rings[frame_shape] = SharedFrameRing(frame_shape, self.slots)
+                self.free_slots[frame_shape] = list(range(self.slots))
+            ring = self.rings[frame_shape]
+            free_slots = self.free_slots[frame_shape]
+            self.condition.wait_for(lambda: free_slots)
+            slot = free_slots.pop()
+            self.request_slots[request_id] = (frame_shape, slot)
+            self.request_kinds[request_id] = kind
+            self.request_workers[request_id] = worker
+            np.copyto(ring.frames[slot], rgb_frame)
+        
+        self.request_queues[worker].put((request_id, kind, key, ring.name, ring.frame_shape, ring.slots, slot))
+        return request_id
+    
+    def _worker(self, kind, key):
+        return (INFERENCE_KINDS.index(kind) + (hash(key) if key is not None else 0)) % len(self.request_queues)
+    
+    def reset_face(self, key=None):
+        # Queued behind the key's earlier face requests on the same worker
+        self.request_queues[self._worker("face", key)].put((None, "reset", key, None, None, None, None))
+    
+    def result(self, request_id):
+        # None (no landmarks, or no face for presence) if the worker has exited
+        # or has not answered within INFERENCE_RESULT_TIMEOUT
+        deadline = time.monotonic() + INFERENCE_RESULT_TIMEOUT
+        with self.condition:
+            while request_id not in self.responses:
+                if request_id not in self.request_slots:
+                    # Released when its worker exited
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.abandoned.add(request_id)
+                    print(f"Inference worker {self.request_workers[request_id]} did not answer "
+                          f"within {INFERENCE_RESULT_TIMEOUT}s")
+                    return None
+                self.condition.wait(remaining)
+            return self.responses.pop(request_id)
+    
+    def detect_presence(self, rgb_frame, key=None):
+        return self.result(self.submit("presence", rgb_frame, key))
+    
+    def detect_face(self, rgb_frame, key=None):
+        return self.result(self.submit("face", rgb_frame, key))
+    
+    def detect_hands(self, rgb_frame, key=None):
+        return self.result(self.submit("hands", rgb_frame, key))
+    
+    def detect_face_and_hands(self, rgb_frame, key=None):
+        face_request = self.submit("face", rgb_frame, key)
+        hands_request = self.submit("hands", rgb_frame, key)
+        return self.result(face_request), self.result(hands_request)
+    
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for request_queue in self.request_queues:
+            request_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.collector.join()
+        for pipe in self.response_pipes:
+            pipe.close()
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+
+def create_landmarker():
+    # In-process models by default; a shared worker pool when INFERENCE_WORKERS is set
+    global inference_pool
+    if INFERENCE_WORKERS <= 0:
+        return LocalLandmarker()
+    if inference_pool is None:
+        inference_pool = ProcessPoolLandmarker(INFERENCE_WORKERS)
+    return inference_pool
+
+class InferenceBudget:
+    # Decides which models run on a frame in combined mode. Each model has a
+    # target rate; when the measured cost of running them all at those rates
+    # would exceed the CPU budget, every rate is scaled down by the same factor.
+    def __init__(self, cpu_budget=None):
+        self.cpu_budget = cpu_budget if cpu_budget is not None else INFERENCE_CPU_BUDGET
+        self.costs = {}
+        self.next_due = {}
+    
+    def record(self, model, seconds):
+        cost = self.costs.get(model)
+        self.costs[model] = seconds if cost is None else cost * 0.9 + seconds * 0.1
+    
+    def effective_rates(self, rates):
+        demand = sum(self.costs.get(model, 0.0) * rate for model, rate in rates.items())
+        scale = min(1.0, self.cpu_budget / demand) if demand > 0 else 1.0
+        return {model: max(rate * scale, MIN_MODEL_FPS) for model, rate in rates.items()}
+    
+    def due(self, rates, current_time):
+        # A few ms of slack so a model due every other camera frame is not
+        # pushed back a frame by timestamp jitter
+        return [model for model in rates if current_time >= self.next_due.get(model, 0.0) - 0.005]
+    
+    def mark_run(self, model, rate, current_time):
+        self.next_due[model] = current_time + 1.0 / rate
+
+class MotionGate:
+    # Tells whether the face region has changed since the frame the current
+    # landmarks were computed on, see MOTION_GATE_SIZE
+    def __init__(self, size=MOTION_GATE_SIZE):
+        self.size = size
+        self.region = None
+        self.reference_time = 0.0
+        self.thumbnail = np.empty((size, size, 3), dtype=np.uint8)
+        self.gray = np.empty((size, size), dtype=np.uint8)
+        self.reference = np.empty((size, size), dtype=np.uint8)
+        self.difference = np.empty((size, size), dtype=np.uint8)
+        self.checked_frames = 0
+        self.skipped_frames = 0
+    
+    def reset(self):
+        self.region = None
+    
+    def _sample(self, rgb_frame):
+        x0, y0, x1, y1 = self.region
+        cv2.resize(rgb_frame[y0:y1, x0:x1], (self.size, self.size), dst=self.thumbnail, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.thumbnail, cv2.COLOR_RGB2GRAY, dst=self.gray)
+    
+    def is_static(self, rgb_frame, current_time):
+        if self.region is None or current_time - self.reference_time > MOTION_MAX_STALENESS:
+            return False
+        self.checked_frames += 1
+        self._sample(rgb_frame)
+        cv2.absdiff(self.gray, self.reference, dst=self.difference)
+        changed = np.count_nonzero(self.difference > MOTION_PIXEL_DELTA)
+        if changed > MOTION_CHANGED_FRACTION * self.size * self.size:
+            return False
+        self.skipped_frames += 1
+        return True
+    
+    def update(self, rgb_frame, points, current_time):
+        # Takes the reference thumbnail for freshly computed landmarks
+        if points is None:
+            self.region = None
+            return
+        frame_h, frame_w, _ = rgb_frame.shape
+        min_x, min_y = points[:, :2].min(axis=0) * (frame_w, frame_h)
+        max_x, max_y = points[:, :2].max(axis=0) * (frame_w, frame_h)
+        x0, y0 = max(int(min_x), 0), max(int(min_y), 0)
+        x1, y1 = min(int(max_x) + 1, frame_w), min(int(max_y) + 1, frame_h)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            self.region = None
+            return
+        self.region = (x0, y0, x1, y1)
+        self.reference_time = current_time
+        self._sample(rgb_frame)
+        self.reference[:] = self.gray
+
+class PointKalmanFilter:
+    # Constant-velocity Kalman filter over a set of 2D points. Every
+    # coordinate is updated at the same times with the same noise levels, so
+    # a single 2x2 position/velocity covariance serves all of them.
+    def __init__(self, acceleration_std=KALMAN_ACCELERATION_STD):
+        self.acceleration_variance = acceleration_std ** 2
+        self.position = None
+        self.velocity = None
+        self.covariance = None
+        self.time = 0.0
+    
+    def reset(self):
+        self.position = None
+    
+    def update(self, measured, current_time, measurement_noise):
+        if self.position is None or self.position.shape != measured.shape:
+            self.position = measured.astype(np.float64)
+            self.velocity = np.zeros_like(self.position)
+            self.covariance = np.diag([measurement_noise, self.acceleration_variance])
+            self.time = current_time
+            return self.position
+        
+        # Predict
+        dt = max(current_time - self.time, 1e-3)
+        self.time = current_time
+        transition = np.array([[1.0, dt], [0.0, 1.0]])
+        process = self.acceleration_variance * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self.position += self.velocity * dt
+        self.covariance = transition @ self.covariance @ transition.T + process
+        
+        # Correct with the measured positions
+        gain = self.covariance[:, 0] / (self.covariance[0, 0] + measurement_noise)
+        innovation = measured - self.position
+        self.position += gain[0] * innovation
+        self.velocity += gain[1] * innovation
+        self.covariance = self.covariance - np.outer(gain, self.covariance[0])
+        return self.position
+
+class LandmarkFlowTracker:
+    # Carries FaceMesh landmarks from a keyframe to the following frames.
+    # FLOW_POINTS are followed with pyramidal Lucas-Kanade flow and smoothed
+    # by a PointKalmanFilter; the rest of the mesh moves with them through a
+    # similarity transform, so face size and position stay consistent.
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.gray = None
+        self.previous_gray = None
+        self.keyframe_points = None
+        self.keyframe_pixels = None
+        self.flow_pixels = None
+        self.frames_since_keyframe = 0
+        self.filter = PointKalmanFilter()
+    
+    def _convert(self, rgb_frame):
+        # Two gray buffers, swapped so the previous frame is kept for the flow
+        if self.gray is None or self.gray.shape != rgb_frame.shape[:2]:
+            self.gray = np.empty(rgb_frame.shape[:2], dtype=np.uint8)
+            self.previous_gray = np.empty_like(self.gray)
+        self.previous_gray, self.gray = self.gray, self.previous_gray
+        cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY, dst=self.gray)
+    
+    def reset(self):
+        self.keyframe_points = None
+        self.filter.reset()
+    
+    def start(self, rgb_frame, points, current_time):
+        # Takes FaceMesh landmarks as the new keyframe and returns them with
+        # FLOW_POINTS smoothed
+        if points is None:
+            self.reset()
+            return None
+        frame_h, frame_w, _ = rgb_frame.shape
+        frame_scale = np.array((frame_w, frame_h), dtype=np.float32)
+        self._convert(rgb_frame)
+        self.keyframe_points = points
+        self.keyframe_pixels = points[FLOW_POINTS, :2] * frame_scale
+        self.flow_pixels = self.keyframe_pixels.reshape(-1, 1, 2).copy()
+        self.frames_since_keyframe = 0
+        
+        smoothed = points.copy()
+        smoothed[FLOW_POINTS, :2] = self.filter.update(self.keyframe_pixels, current_time, KALMAN_MODEL_NOISE) / frame_scale
+        return smoothed
+    
+    def track(self, rgb_frame, current_time):
+        # Landmarks for this frame, or None when the next keyframe is due or
+        # the flow lost a point
+        interval = self.interval if self.interval is not None else KEYFRAME_INTERVAL
+        if self.keyframe_points is None or self.frames_since_keyframe >= interval - 1:
+            return None
+        self._convert(rgb_frame)
+        flow_pixels, status, error = cv2.calcOpticalFlowPyrLK(
+            self.previous_gray, self.gray, self.flow_pixels, None,
+            winSize=(FLOW_WINDOW, FLOW_WINDOW), maxLevel=FLOW_PYRAMID_LEVELS
+        )
+        if flow_pixels is None or not status.all() or error.max() > FLOW_MAX_ERROR:
+            self.keyframe_points = None
+            return None
+        pixels = flow_pixels.reshape(-1, 2)
+        transform, _ = cv2.estimateAffinePartial2D(self.keyframe_pixels, pixels)
+        if transform is None:
+            self.keyframe_points = None
+            return None
+        self.flow_pixels = flow_pixels
+        self.frames_since_keyframe += 1
+        
+        frame_h, frame_w, _ = rgb_frame.shape
+        frame_scale = np.array((frame_w, frame_h), dtype=np.float32)
+        points = self.keyframe_points.copy()
+        points[:, :2] = (points[:, :2] * frame_scale @ transform[:, :2].T + transform[:, 2]) / frame_scale
+        points[FLOW_POINTS, :2] = self.filter.update(pixels, current_time, KALMAN_FLOW_NOISE) / frame_scale
+        return points
+
+class BlinkStats:
+    # Rolling eye statistics over the last BLINK_WINDOW seconds, updated once
+    # per analyzed frame in amortized constant time. Only blinks (start time
+    # and closure intervals) inside the window are kept, so memory is bounded
+    # by the blink rate rather than the session length.
+    #   blink_rate: blinks started in the window, per minute
+    #   perclos: share of the observed window the eyes were closed
+    #   mean_duration: mean length (seconds) of blinks completed in the window
+    def __init__(self, window=BLINK_WINDOW):
+        self.window = window
+        self.blink_starts = deque()
+        self.closures = deque()
+        self.closed_total = 0.0
+        self.eyes_closed = False
+        self.closed_since = 0.0
+        self.first_time = None
+        self.time = 0.0
+    
+    def update(self, eyes_shut, current_time):
+        # Returns "start" or "end" on a blink transition, "" otherwise
+        if self.first_time is None:
+            self.first_time = current_time
+        self.time = current_time
+        transition = ""
+        if eyes_shut and not self.eyes_closed:
+            self.eyes_closed = True
+            self.closed_since = current_time
+            self.blink_starts.append(current_time)
+            transition = "start"
+        elif self.eyes_closed and not eyes_shut:
+            self.eyes_closed = False
+            self.closures.append((self.closed_since, current_time))
+            self.closed_total += current_time - self.closed_since
+            transition = "end"
+        
+        window_start = current_time - self.window
+        while self.blink_starts and self.blink_starts[0] < window_start:
+            self.blink_starts.popleft()
+        while self.closures and self.closures[0][1] < window_start:
+            start, end = self.closures.popleft()
+            self.closed_total -= end - start
+        return transition
+    
+    def take_over(self, eyes_closed, current_time):
+        # Adopts the eye state of a new blink source without counting a
+        # transition, so switching sources never makes up a blink. A closure
+        # the old source left open is dropped along with its start.
+        if self.eyes_closed and self.blink_starts and self.blink_starts[-1] == self.closed_since:
+            self.blink_starts.pop()
+        self.eyes_closed = eyes_closed
+        self.closed_since = current_time
+    
+    @property
+    def last_duration(self):
+        return self.closures[-1][1] - self.closures[-1][0] if self.closures else 0.0
+    
+    @property
+    def blink_count(self):
+        return len(self.blink_starts)
+    
+    @property
+    def blink_rate(self):
+        return len(self.blink_starts) * 60.0 / self.window
+    
+    @property
+    def perclos(self):
+        if self.first_time is None:
+            return 0.0
+        window_start = self.time - self.window
+        closed = self.closed_total
+        # The oldest closure may have started before the window
+        if self.closures and self.closures[0][0] < window_start:
+            closed -= window_start - self.closures[0][0]
+        if self.eyes_closed:
+            closed += self.time - max(self.closed_since, window_start)
+        observed = min(self.window, self.time - self.first_time)
+        return closed / observed if observed > 0 else float(self.eyes_closed)
+    
+    @property
+    def mean_duration(self):
+        return self.closed_total / len(self.closures) if self.closures else 0.0
+
+class EyeBlinkTracker:
+    # Blink timing at the capture rate, see EYE_TRACKER_ENABLED. process()
+    # runs on the capture thread on raw (unmirrored) frames; the analyzer
+    # passes the eye landmarks of each analyzed frame to set_eyes() and reads
+    # blink transitions, (eyes_closed, capture time) tuples, from the
+    # transitions deque. Between landmark updates the crops follow the best
+    # match of the open-eye template within EYE_SEARCH_MARGIN. The search
+    # windows of recent frames are kept, so each update corrects the position
+    # followed on the very frame FaceMesh saw and calibrates on that frame.
+    # The score is 1 minus the best normalized correlation, averaged over both
+    # eyes: near 0 for an open eye, rising as the lid covers it.
+    def __init__(self, crop_size=EYE_CROP_SIZE, padding=EYE_CROP_PADDING, search_margin=EYE_SEARCH_MARGIN):
+        self.crop_size = crop_size
+        self.padding = padding
+        crop_w, crop_h = crop_size
+        self.margin = np.array((round(crop_w * search_margin), round(crop_h * search_margin)))
+        self.window_size = (crop_w + 2 * int(self.margin[0]), crop_h + 2 * int(self.margin[1]))
+        self.windows = np.empty((2, self.window_size[1], self.window_size[0]), dtype=np.float32)
+        self.offsets = np.zeros((2, 2), dtype=np.float32)
+        # Latest (eyes, capture time, label) from set_eyes, with eyes the
+        # (2, 4, 2) raw-frame normalized points per eye (EYE_TRACKER_POINTS)
+        self.landmarks = None
+        self.applied_landmarks = None
+        # Eye centers and crop widths in pixels; history holds (capture time,
+        # crop centers, crop widths, windows, score, followed centers) per frame
+        self.centers = None
+        self.widths = None
+        self.velocity = np.zeros((2, 2), dtype=np.float32)
+        self.last_time = None
+        self.history = deque(maxlen=EYE_HISTORY_FRAMES)
+        self.openness = deque(maxlen=EYE_CALIBRATION_WINDOW)
+        self.template = None
+        self.open_mean = 0.0
+        self.open_var = 0.0
+        self.open_samples = 0
+        self.closed_mean = None
+        self.eyes_closed = False
+        # At most one transition per captured frame, and the analyzer drains
+        # them on every face frame
+        self.transitions = deque(maxlen=EYE_HISTORY_FRAMES)
+        self.frames = 0
+        self.blinks = 0
+    
+    @property
+    def ready(self):
+        return self.open_samples >= EYE_CALIBRATION_FRAMES
+    
+    @property
+    def threshold(self):
+        margin = max(EYE_CLOSED_SIGMA * float(np.sqrt(self.open_var)), EYE_MIN_SCORE_MARGIN)
+        if self.closed_mean is not None:
+            # Halfway to the closed-eye score, when FaceMesh has seen closed eyes
+            margin = max((self.closed_mean - self.open_mean) / 2, EYE_MIN_SCORE_MARGIN)
+        return self.open_mean + margin
+    
+    def set_eyes(self, points, timestamp, fresh):
+        # Called by the analyzer with landmarks in its mirrored frame and the
+        # frame's capture time, or None when the face is lost or face tracking
+        # stops. Fresh FaceMesh landmarks also label the frame as open or
+        # closed for calibration.
+        if points is None:
+            # Crops of a face that is leaving look like closed eyes; drop what
+            # the tracker saw since the last analyzed face
+            self.landmarks = None
+            self.transitions.clear()
+            return
+        eyes = points[EYE_TRACKER_POINTS, :2].reshape(2, 4, 2)
+        eyes[..., 0] = 1.0 - eyes[..., 0]
+        label = None
+        if fresh:
+            gaps = np.abs(eyes[:, 2, 1] - eyes[:, 3, 1])
+            widths = np.abs(eyes[:, 1, 0] - eyes[:, 0, 0])
+            openness = float((gaps / np.maximum(widths, 1e-6)).mean())
+            self.openness.append(openness)
+            reference = float(np.median(self.openness))
+            if openness >= EYE_OPEN_FRACTION * reference:
+                label = "open"
+            elif openness <= EYE_CLOSED_FRACTION * reference:
+                label = "closed"
+        self.landmarks = (eyes, timestamp, label)
+    
+    def _apply_landmarks(self, landmarks, frame_w, frame_h):
+        eyes, timestamp, label = landmarks
+        eyes = eyes * (frame_w, frame_h)
+        centers = np.stack(((eyes[:, 0, 0] + eyes[:, 1, 0]) / 2, eyes[:, :, 1].mean(axis=1)), axis=1)
+        for frame_time, crop_centers, widths, windows, score, followed in self.history:
+            if frame_time == timestamp:
+                # Where the eyes really were on that frame, plus how far they have moved since
+                self.centers += centers - followed
+                if label is not None:
+                    shifts = (centers - crop_centers) / (widths / self.crop_size[0])[:, None]
+                    self._calibrate(label, windows, shifts, score)
+                break
+        else:
+            self.centers = centers
+        self.widths = np.abs(eyes[:, 1, 0] - eyes[:, 0, 0]) * (1 + 2 * self.padding)
+    
+    def _crop(self, frame):
+        # Fills self.windows with the grayscale search window around each eye;
+        # False when an eye is too small or outside the frame
+        frame_h, frame_w = frame.shape[:2]
+        crop_w, crop_h = self.crop_size
+        window_w, window_h = self.window_size
+        for index, ((center_x, center_y), width) in enumerate(zip(self.centers, self.widths)):
+            width = width * window_w / crop_w
+            height = width * window_h / window_w
+            x0, y0 = int(center_x - width / 2), int(center_y - height / 2)
+            x1, y1 = int(center_x + width / 2), int(center_y + height / 2)
+            if x0 < 0 or y0 < 0 or x1 > frame_w or y1 > frame_h or x1 - x0 < crop_w // 2:
+                return False
+            gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+            self.windows[index] = cv2.resize(gray, self.window_size, interpolation=cv2.INTER_AREA)
+        return True
+    
+    def _match(self):
+        # Best normalized correlation of each eye's template within its
+        # window, and how far (window pixels) the best match is off center
+        scores = []
+        for index, (window, template) in enumerate(zip(self.windows, self.template)):
+            _, best, _, location = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+            scores.append(best)
+            self.offsets[index] = np.subtract(location, self.margin)
+        return 1.0 - sum(scores) / 2
+    
+    def _transition(self, eyes_closed, timestamp):
+        self.eyes_closed = eyes_closed
+        self.blinks += eyes_closed
+        self.transitions.append((eyes_closed, timestamp))
+    
+    def process(self, frame, timestamp):
+        landmarks = self.landmarks
+        if landmarks is not self.applied_landmarks:
+            self.applied_landmarks = landmarks
+            if landmarks is not None:
+                self._apply_landmarks(landmarks, frame.shape[1], frame.shape[0])
+        if landmarks is None or not self._crop(frame):
+            # No eyes to look at; a blink in progress ends here. Without
+            # landmarks the analyzer has stopped reading transitions and
+            # resyncs with eyes_closed when the face is back.
+            self.history.clear()
+            self.velocity[:] = 0
+            self.last_time = None
+            if landmarks is None:
+                self.eyes_closed = False
+            elif self.eyes_closed:
+                self._transition(False, timestamp)
+            return
+        self.frames += 1
+        crop_centers = self.centers.copy()
+        score = None
+        if self.template is not None:
+            score = self._match()
+            if self.ready:
+                threshold = self.threshold
+                if not self.eyes_closed and score > threshold:
+                    self._transition(True, timestamp)
+                elif self.eyes_closed and score < threshold - (threshold - self.open_mean) * EYE_HYSTERESIS:
+                    self._transition(False, timestamp)
+            elapsed = timestamp - self.last_time if self.last_time is not None else 0.0
+            if not self.eyes_closed:
+                step = self.offsets * (self.widths / self.crop_size[0])[:, None]
+                self.centers += step
+                if elapsed > 0:
+                    self.velocity += EYE_VELOCITY_SMOOTHING * (step / elapsed - self.velocity)
+            else:
+                # A closed lid is no guide to where the eyes are; keep them moving as before
+                self.centers += self.velocity * elapsed
+        self.last_time = timestamp
+        self.history.append((timestamp, crop_centers, self.widths.copy(), self.windows.copy(), score, self.centers.copy()))
+    
+    def _calibrate(self, label, windows, shifts, score):
+        # Calibrates on a past frame FaceMesh labelled, with shifts the
+        # landmark eye centers relative to that frame's windows
+        rate = EYE_CALIBRATION_RATE
+        if label == "closed":
+            if score is not None:
+                self.closed_mean = score if self.closed_mean is None else self.closed_mean + rate * (score - self.closed_mean)
+            return
+        # FaceMesh can miss a closing lid; the tracker's own score overrules it
+        if self.open_samples and score is not None and score > self.threshold:
+            return
+        crop_w, crop_h = self.crop_size
+        corners = np.rint(self.margin + shifts).astype(int)
+        if (corners < 0).any() or (corners > 2 * self.margin).any():
+            return
+        # The open eyes centered on the landmarks, so the template keeps to
+        # them while following slow changes in pose and lighting
+        patches = np.stack([window[y:y + crop_h, x:x + crop_w] for window, (x, y) in zip(windows, corners)])
+        if self.template is None:
+            self.template = patches
+            return
+        self.template += rate * (patches - self.template)
+        if score is None:
+            return
+        if self.open_samples == 0:
+            self.open_mean = score
+        else:
+            delta = score - self.open_mean
+            self.open_mean += rate * delta
+            self.open_var = (1 - rate) * (self.open_var + rate * delta * delta)
+        self.open_samples += 1
+
+class FrameResult:
+    # What the analyzer decided for one frame. events holds ("pause",),
+    # ("play",) and ("alert", title, message, icon) tuples; landmarks and
+    # geometry are None when no face was analyzed. The blink statistics are
+    # None until a face has been analyzed.
+    __slots__ = ("timestamp", "face", "landmarks", "geometry", "playing", "distance", "drowsiness", "blink",
+                 "blink_rate", "perclos", "blink_duration", "events")
+    
+    def __init__(self, timestamp, playing):
+        self.timestamp = timestamp
+        self.face = False
+        self.landmarks = None
+        self.geometry = None
+        self.playing = playing
+        self.distance = ""
+        self.drowsiness = ""
+        self.blink = ""
+        self.blink_rate = None
+        self.perclos = None
+        self.blink_duration = None
+        self.events = []
+
+class FrameAnalyzer:
+    # Per-frame face/gesture, drowsiness and distance logic. Owns all of the
+    # detection state and never touches the UI: callers get a FrameResult
+    # back and subscribers are notified with it.
+    def __init__(self, timers=None, landmarker=None, key=None, eye_tracker=None):
+        self.landmarker = landmarker if landmarker is not None else LocalLandmarker()
+        # Identifies this analyzer's stream to a shared landmarker
+        self.key = key
+        # Capture-rate blink timing, fed the eye positions from each face pass;
+        # blinks come from it once it is calibrated. eye_tracker_timing is
+        # cleared whenever the face is lost, so the blink statistics take the
+        # tracker's state over again when it is back.
+        self.eye_tracker = eye_tracker
+        self.eye_tracker_timing = False
+        self.subscribers = []
+        self.timers = timers if timers is not None else StageTimers()
+        
+        # Control mode, kept in sync with the UI by the monitoring loop
+        self.control_mode = "face"
+        self.active_mode = "face"
+        self.strict_mode = False
+        self.budget = InferenceBudget()
+        
+        # Playback state: playing while the user looks at the screen (face
+        # tracking) and has not paused with a pinch (gesture tracking)
+        self.is_playing = True
+        self.attentive = True
+        self.gesture_paused = False
+        self.face_in_view = False
+        self.away_since = None
+        self.close_popup_shown = False
+        self.gesture_cooldown_until = 0
+        
+        # Presence cascade state, see PRESENCE_CHECK_FPS. face_cost is the
+        # time the face models took on the latest frame, for the budget.
+        self.user_present = True
+        self.presence_hits = 0
+        self.face_misses = 0
+        self.face_cost = 0.0
+        
+        # Motion gate and keyframe tracker, and the landmarks they carry forward
+        self.motion_gate = MotionGate()
+        self.flow_tracker = LandmarkFlowTracker()
+        self.last_points = None
+        
+        # Drowsiness state
+        self.last_drowsy_alert = 0
+        self.drowsiness_detected = False
+        self.blink_stats = BlinkStats()
+        # Eye openness of recent face frames, for blinks without the eye tracker
+        self.eye_openness = deque(maxlen=EYE_CALIBRATION_WINDOW)
+    
+    def subscribe(self, callback, stage="subscriber"):
+        # stage names the latency histogram the callback is timed under
+        self.subscribers.append((callback, stage))
+    
+    def process(self, frame, rgb_frame, current_time):
+        if self.control_mode != self.active_mode:
+            self._switch_mode(current_time)
+        result = FrameResult(current_time, self.is_playing)
+        
+        if self.control_mode == "gesture":
+            self._detect_gesture(rgb_frame, current_time, result)
+            self._set_playing(not self.gesture_paused, result)
+        elif self.control_mode == "combined":
+            self._analyze_combined(frame, rgb_frame, current_time, result)
+            self._set_playing(self.attentive and not self.gesture_paused, result)
+        else:
+            self._analyze_face(frame, rgb_frame, current_time, result)
+            self._set_playing(self.attentive, result)
+        
+        result.playing = self.is_playing
+        for callback, stage in self.subscribers:
+            start = time.perf_counter()
+            callback(result)
+            self.timers.record(stage, time.perf_counter() - start)
+        return result
+    
+    def _switch_mode(self, current_time):
+        # Carry the current playback state over, so switching modes never
+        # resumes or pauses by itself
+        resumes_face = self.active_mode == "gesture"
+        self.active_mode = self.control_mode
+        self.attentive = self.is_playing or self.control_mode == "gesture"
+        self.gesture_paused = not self.is_playing and self.control_mode == "gesture"
+        if self.control_mode == "gesture":
+            if self.eye_tracker is not None:
+                # Face tracking stops, so the eye crops have nothing to follow
+                self.eye_tracker.set_eyes(None, current_time, fresh=False)
+                self.eye_tracker_timing = False
+        elif resumes_face:
+            # The face has moved on since; nothing from before the switch is carried forward
+            self.landmarker.reset_face(self.key)
+            self.motion_gate.reset()
+            self.flow_tracker.reset()
+    
+    def _set_playing(self, playing, result):
+        if playing != self.is_playing:
+            self.is_playing = playing
+            result.events.append(("play",) if playing else ("pause",))
+    
+    def _detect_gesture(self, rgb_frame, current_time, result):
+        start = time.perf_counter()
+        hand_points = self.landmarker.detect_hands(rgb_frame, self.key)
+        self.timers.record("hands.process", time.perf_counter() - start)
+        self._apply_hands(hand_points, current_time)
+    
+    def _apply_hands(self, hand_points, current_time):
+        # Short cooldown after each toggle so one pinch does not flip playback repeatedly
+        if hand_points is None or current_time < self.gesture_cooldown_until:
+            return
+        
+        for points in hand_points:
+            # Thumb tip to index finger tip
+            distance = float(np.hypot(*(points[4, :2] - points[8, :2])))
+            
+            paused = distance < 0.1
+            if paused != self.gesture_paused:
+                self.gesture_paused = paused
+                self.gesture_cooldown_until = current_time + GESTURE_COOLDOWN
+                break
+    
+    def _analyze_combined(self, frame, rgb_frame, current_time, result):
+        # Face and hand tracking on the same frame, each at its own rate within the CPU budget
+        rates = self.budget.effective_rates({"face": self.face_frame_rate(), "hands": GESTURE_MODE_FPS})
+        due = self.budget.due(rates, current_time)
+        result.face = self.face_in_view
+        if not due:
+            return
+        
+        start = time.perf_counter()
+        carried = self._carry_landmarks(rgb_frame, current_time) if "face" in due else None
+        if carried is not None:
+            points = carried
+            if "hands" in due:
+                hand_points = self.landmarker.detect_hands(rgb_frame, self.key)
+        elif len(due) == 2 and self.user_present:
+            points, hand_points = self.landmarker.detect_face_and_hands(rgb_frame, self.key)
+            self.face_cost = self.landmarker.last_costs["face"]
+            points = self._track_presence(points, rgb_frame, current_time)
+        else:
+            # While the user is away the face step is only the cheap presence check
+            if "hands" in due:
+                hand_points = self.landmarker.detect_hands(rgb_frame, self.key)
+            if "face" in due:
+                points = self._infer_face(rgb_frame, current_time)
+        self.timers.record("+".join(due) + ".process", time.perf_counter() - start)
+        
+        costs = {"face": self.face_cost, "hands": self.landmarker.last_costs["hands"]}
+        for model in due:
+            self.budget.record(model, costs[model])
+            self.budget.mark_run(model, rates[model], current_time)
+        if "hands" in due:
+            self._apply_hands(hand_points, current_time)
+        if "face" in due:
+            self._apply_face(points, frame.shape, current_time, result)
+    
+    def combined_frame_rate(self):
+        # Frame rate the monitoring loop needs so each model can run at its budgeted rate
+        return max(self.budget.effective_rates({"face": self.face_frame_rate(), "hands": GESTURE_MODE_FPS}).values())
+    
+    def face_frame_rate(self):
+        # A first detection already steps the rate up so it can be confirmed quickly
+        if self.user_present and KEYFRAME_INTERVAL > 1:
+            return KEYFRAME_MODE_FPS
+        if self.user_present or self.presence_hits:
+            return FACE_MODE_FPS
+        return PRESENCE_CHECK_FPS
+    
+    def _carry_landmarks(self, rgb_frame, current_time):
+        # Landmarks for this frame without a FaceMesh pass: followed by optical
+        # flow in keyframe mode, otherwise reused while the motion gate finds
+        # the face unchanged. None when a fresh pass is needed.
+        if not self.user_present or self.last_points is None:
+            return None
+        start = time.perf_counter()
+        if KEYFRAME_INTERVAL > 1:
+            points = self.flow_tracker.track(rgb_frame, current_time)
+            stage = "landmark_flow"
+        elif MOTION_GATE_ENABLED:
+            points = self.last_points if self.motion_gate.is_static(rgb_frame, current_time) else None
+            stage = "motion_gate"
+        else:
+            return None
+        if KEYFRAME_INTERVAL > 1 and points is not None and self.eye_tracker is not None:
+            self.eye_tracker.set_eyes(points, current_time, fresh=False)
+        self.face_cost = time.perf_counter() - start
+        self.timers.record(stage, self.face_cost)
+        return points
+    
+    def _detect_face(self, rgb_frame, current_time):
+        # Face landmarks, or None while nobody is in view
+        points = self._carry_landmarks(rgb_frame, current_time)
+        if points is not None:
+            return points
+        return self._infer_face(rgb_frame, current_time)
+    
+    def _infer_face(self, rgb_frame, current_time):
+        # Presence check or FaceMesh, depending on whether the user is in view
+        presence_cost = 0.0
+        if not self.user_present:
+            start = time.perf_counter()
+            found = self.landmarker.detect_presence(rgb_frame, self.key)
+            presence_cost = time.perf_counter() - start
+            self.timers.record("face_detection.process", presence_cost)
+            self.presence_hits = self.presence_hits + 1 if found else 0
+            if self.presence_hits < PRESENCE_CONFIRM_FRAMES:
+                self.face_cost = presence_cost
+                return None
+            self.user_present = True
+            self.face_misses = 0
+        
+        start = time.perf_counter()
+        points = self.landmarker.detect_face(rgb_frame, self.key)
+        mesh_cost = time.perf_counter() - start
+        self.timers.record("face_mesh.process", mesh_cost)
+        self.face_cost = presence_cost + mesh_cost
+        return self._track_presence(points, rgb_frame, current_time)
+    
+    def _track_presence(self, points, rgb_frame, current_time):
+        # Called with fresh FaceMesh landmarks; returns the landmarks to use,
+        # smoothed in keyframe mode
+        self.last_points = points
+        if self.eye_tracker is not None:
+            self.eye_tracker.set_eyes(points, current_time, fresh=True)
+        if KEYFRAME_INTERVAL > 1:
+            points = self.flow_tracker.start(rgb_frame, points, current_time)
+        elif MOTION_GATE_ENABLED:
+            self.motion_gate.update(rgb_frame, points, current_time)
+        if points is not None:
+            self.face_misses = 0
+            return points
+        self.face_misses += 1
+        if self.face_misses >= PRESENCE_LOST_FRAMES:
+            self.user_present = False
+            self.presence_hits = 0
+        return None
+    
+    def _check_drowsiness(self, geometry, current_time, result):
+        stats = self.blink_stats
+        if self.eye_tracker is not None and self.eye_tracker.ready:
+            # Blinks timed by the eye tracker, replayed up to this frame's capture time
+            transitions = self.eye_tracker.transitions
+            if not self.eye_tracker_timing:
+                # A closure the eyelid gap left open is dropped rather than
+                # ended as a blink the tracker did not time
+                self.eye_tracker_timing = True
+                eyes_shut = not transitions[0][0] if transitions else self.eye_tracker.eyes_closed
+                stats.take_over(eyes_shut, stats.time if stats.first_time is not None else current_time)
+            while transitions and transitions[0][1] <= current_time:
+                eyes_shut, timestamp = transitions.popleft()
+                self._record_blink(stats.update(eyes_shut, max(timestamp, stats.time)), result)
+            # With later transitions still queued the last one replayed is this
+            # frame's state, otherwise the tracker's current one
+            eyes_shut = stats.eyes_closed if transitions else self.eye_tracker.eyes_closed
+        else:
+            eyes_shut = self._eyelid_gap_closed(geometry.eye_openness)
+        head_tilt = geometry.head_tilt
+        
+        # No blink figures until the eyelid gap's median has settled
+        if eyes_shut is not None:
+            self._record_blink(stats.update(eyes_shut, current_time), result)
+            result.blink_rate = stats.blink_rate
+            result.perclos = stats.perclos
+            result.blink_duration = stats.mean_duration
+
+        if head_tilt > HEAD_TILT_THRESHOLD:
+            self.drowsiness_detected = True
+
+        if self.drowsiness_detected and (current_time - self.last_drowsy_alert) > DROWSY_ALERT_INTERVAL:
+            result.events.append(("alert", "Drowsiness Alert",
+                                  "You appear to be drowsy! Consider taking a break.", "warning"))
+            self.last_drowsy_alert = current_time
+            self.drowsiness_detected = False
+
+        if stats.blink_rate > BLINKS_THRESHOLD:
+            result.drowsiness = "High Blink Rate"
+        elif self.drowsiness_detected:
+            result.drowsiness = "Drowsy"
+        else:
+            result.drowsiness = "Alert"
+    
+    def _eyelid_gap_closed(self, openness):
+        # True or False against the median openness of recent face frames,
+        # the current state in between, None while there are too few frames
+        self.eye_openness.append(openness)
+        if len(self.eye_openness) < EYE_CALIBRATION_FRAMES:
+            return None
+        reference = float(np.median(self.eye_openness))
+        if openness <= EYE_CLOSED_FRACTION * reference:
+            return True
+        if openness >= EYE_OPEN_FRACTION * reference:
+            return False
+        return self.blink_stats.eyes_closed
+    
+    def _record_blink(self, transition, result):
+        if not transition:
+            return
+        result.blink = transition
+        if transition == "end" and self.blink_stats.last_duration > DROWSY_BLINK_DURATION:
+            self.drowsiness_detected = True
+    
+    def _analyze_face(self, frame, rgb_frame, current_time, result):
+        points = self._detect_face(rgb_frame, current_time)
+        self._apply_face(points, frame.shape, current_time, result)
+    
+    def _apply_face(self, points, frame_shape, current_time, result):
+        frame_h, frame_w, _ = frame_shape
+        self.face_in_view = points is not None
+        result.face = self.face_in_view
+
+        if points is None:
+            self.eye_tracker_timing = False
+            result.distance = "No Face Detected"
+            result.drowsiness = "No Face Detected"
+            return
+        
+        start = time.perf_counter()
+        geometry = FaceGeometry(points, frame_w, frame_h)
+        result.landmarks = points
+        result.geometry = geometry
+        
+        self._check_drowsiness(geometry, current_time, result)
+        self.timers.record("face_geometry", time.perf_counter() - start)
+
+        if geometry.normalized_distance > CLOSE_THRESHOLD:
+            result.distance = "Too Close"
+            if not self.close_popup_shown:
+                result.events.append(("alert", "Too Close",
+                                      "You are too close to the screen. Please move back!", "warning"))
+                self.close_popup_shown = True
+        elif geometry.normalized_distance < FAR_THRESHOLD:
+            result.distance = "Too Far"
+        elif FAR_THRESHOLD <= geometry.normalized_distance <= CLOSE_THRESHOLD:
+            result.distance = "Just Right"
+            self.close_popup_shown = False
+
+        if (abs(geometry.norm_horizontal_tilt) > LOOK_THRESHOLD or 
+            abs(geometry.norm_vertical_tilt) > LOOK_THRESHOLD or 
+            abs(geometry.nose_displacement) > SIDE_LOOK_THRESHOLD):
+            
+            if self.strict_mode:
+                if self.away_since is None:
+                    self.away_since = current_time
+                elif current_time - self.away_since > AWAY_ALERT_THRESHOLD:
+                    result.events.append(("alert", "Focus Alert",
+                                          "You've been looking away for too long. Time to refocus!", "info"))
+                    self.away_since = current_time
+            
+            self.attentive = False
+        else:
+            self.away_since = None
+            self.attentive = True
+
+def actuate_playback(result):
+    # Mirrors the analyzer's play/pause decisions onto the video player
+    for event in result.events:
+        if event[0] in ("play", "pause"):
+            pyautogui.press('k')
+
+def target_frame_rate(analyzer):
+    # Analysis rate for the analyzer's current mode and presence state
+    if analyzer.control_mode == "gesture":
+        return GESTURE_MODE_FPS
+    if analyzer.control_mode == "combined":
+        return analyzer.combined_frame_rate()
+    return analyzer.face_frame_rate()
+
+def start_monitoring(stop):
+    global monitor_timers, monitor_metrics
+
+    monitor_timers = timers = StageTimers()
+    monitor_metrics = metrics = MetricsTimeSeries()
+    grabber = FrameGrabber(cap, timers=timers)
+    grabber.start()
+    scheduler = FrameScheduler()
+    preparer = FramePreparer()
+    eye_tracker = EyeBlinkTracker() if EYE_TRACKER_ENABLED else None
+    if eye_tracker is not None:
+        grabber.add_hook(eye_tracker.process, "eye_tracker")
+    landmarker = create_landmarker()
+    analyzer = FrameAnalyzer(timers, landmarker, eye_tracker=eye_tracker)
+    analyzer.subscribe(actuate_playback, "pyautogui.press")
+    analyzer.subscribe(app.on_frame_result, "ui_update")
+    analyzer.subscribe(metrics.record, "metrics")
+
+    while not stop.is_set():
+        frame, current_time = grabber.read_latest()
+        if frame is None:
+            if grabber.failed:
+                post_alert("Error", "Unable to access webcam.", "cancel")
+                break
+            continue
+
+        frame_start = time.perf_counter()
+        analyzer.control_mode = control_mode
+        analyzer.strict_mode = strict_mode
+        frame, rgb_frame = preparer.prepare(frame)
+        timers.record("flip+cvtColor", time.perf_counter() - frame_start)
+        result = analyzer.process(frame, rgb_frame, current_time)
+        timers.record("frame_total", time.perf_counter() - frame_start)
+        # Glass-to-decision: capture timestamp to the end of analysis
+        timers.record("frame_age", time.time() - current_time)
+
+        scheduler.set_target_fps(target_frame_rate(analyzer))
+        if scheduler.wait():
+            app.ui_bridge.update(frame_rate=(f"Frame Rate: {scheduler.achieved_fps:.1f} fps", None))
+
+    grabber.stop()
+    # The shared worker pool outlives the session and is closed with the app
+    if landmarker is not inference_pool:
+        landmarker.close()
+    print(f"Monitoring stopped, {grabber.dropped_frames} stale frames dropped, "
+          f"{analyzer.motion_gate.skipped_frames} frames reused landmarks")
+    if eye_tracker is not None:
+        print(f"Eye tracker: {eye_tracker.blinks} blinks in {eye_tracker.frames} frames")
+    timers.dump()
+    metrics.dump()
 
     if cap.isOpened():
         cap.release()
     cv2.destroyAllWindows()
 
+class ReplaySource:
+    # Yields frames from a video file or a directory of image files, with
+    # timestamps taken from the recording rather than the wall clock
+    def __init__(self, path, fps=None):
+        self.path = path
+        self.capture = None
+        self.frame_paths = []
+        if os.path.isdir(path):
+            self.frame_paths = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(REPLAY_FRAME_EXTENSIONS)
+            )
+            self.fps = fps or REPLAY_DEFAULT_FPS
+        else:
+            self.capture = cv2.VideoCapture(path)
+            if not self.capture.isOpened():
+                raise IOError(f"Unable to open replay source: {path}")
+            self.fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or REPLAY_DEFAULT_FPS
+    
+    def frames(self):
+        if self.capture is None:
+            for index, frame_path in enumerate(self.frame_paths):
+                frame = cv2.imread(frame_path)
+                if frame is not None:
+                    yield frame, index / self.fps
+            return
+        
+        index = 0
+        frame = None
+        try:
+            while True:
+                ret, frame = self.capture.read() if frame is None else self.capture.read(image=frame)
+                if not ret:
+                    break
+                yield frame, index / self.fps
+                index += 1
+        finally:
+            self.capture.release()
+
+def run_replay(source_path, log_path=None, fps=None):
+    # Feeds a recorded session through the monitoring pipeline as fast as the
+    # CPU allows and writes one decision row per frame
+    source = ReplaySource(source_path, fps)
+    if log_path is None:
+        log_path = f"replay_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    
+    preparer = FramePreparer()
+    eye_tracker = EyeBlinkTracker() if EYE_TRACKER_ENABLED else None
+    landmarker = create_landmarker()
+    analyzer = FrameAnalyzer(landmarker=landmarker, eye_tracker=eye_tracker)
+    analyzer.control_mode = control_mode
+    analyzer.strict_mode = strict_mode
+    # Recording timestamps are offset to the wall clock so alert intervals
+    # behave exactly as they do live
+    base_time = time.time()
+    frame_count = 0
+    start = time.perf_counter()
+    
+    with open(log_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["frame", "time", "face", "playing", "distance", "drowsiness", "blink",
+                         "blink_rate", "perclos", "mean_blink_ms", "alerts"])
+        for frame, timestamp in source.frames():
+            if eye_tracker is not None:
+                # Where the capture thread would run it, on the raw frame
+                tracker_start = time.perf_counter()
+                eye_tracker.process(frame, base_time + timestamp)
+                analyzer.timers.record("eye_tracker", time.perf_counter() - tracker_start)
+            prepare_start = time.perf_counter()
+            frame, rgb_frame = preparer.prepare(frame)
+            analyzer.timers.record("flip+cvtColor", time.perf_counter() - prepare_start)
+            result = analyzer.process(frame, rgb_frame, base_time + timestamp)
+            writer.writerow([
+                frame_count, f"{timestamp:.3f}", int(result.face),
+                "playing" if result.playing else "paused",
+                result.distance, result.drowsiness, result.blink,
+                "" if result.blink_rate is None else f"{result.blink_rate:.1f}",
+                "" if result.perclos is None else f"{result.perclos:.3f}",
+                "" if result.blink_duration is None else f"{result.blink_duration * 1000:.0f}",
+                "|".join(event[1] for event in result.events if event[0] == "alert"),
+            ])
+            frame_count += 1
+    
+    elapsed = time.perf_counter() - start
+    if landmarker is not inference_pool:
+        landmarker.close()
+    print(analyzer.timers.report())
+    print(f"Replayed {frame_count} frames in {elapsed:.2f}s "
+          f"({frame_count / elapsed if elapsed else 0:.1f} fps), decision log saved to {log_path}")
+    print(f"Motion gate: {analyzer.motion_gate.skipped_frames} of {frame_count} frames reused landmarks")
+    if eye_tracker is not None:
+        print(f"Eye tracker: {eye_tracker.blinks} blinks in {eye_tracker.frames} frames")
+    return log_path
+
+class LoopingVideoCapture:
+    # Stands in for a camera in serve mode: plays a video file at its own
+    # frame rate and starts over at the end
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+        self.frame_interval = 1.0 / (self.capture.get(cv2.CAP_PROP_FPS) or REPLAY_DEFAULT_FPS)
+        self.next_frame_time = None
+    
+    def isOpened(self):
+        return self.capture.isOpened()
+    
+    def release(self):
+        self.capture.release()
+    
+    def read(self, image=None):
+        now = time.perf_counter()
+        if self.next_frame_time is None:
+            self.next_frame_time = now
+        elif self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
+        self.next_frame_time += self.frame_interval
+        
+        for _ in range(2):
+            ret, frame = self.capture.read() if image is None else self.capture.read(image=image)
+            if ret:
+                return ret, frame
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return False, None
+
+def open_stream_source(source):
+    # A camera index ("0") or a video file path
+    if source.isdigit():
+        return capture_profile.open(int(source))
+    return LoopingVideoCapture(source)
+
+class MonitoringStream:
+    # One seat in serve mode: its own capture thread, analyzer (playback and
+    # alert state) and latency timers. Inference goes through the shared
+    # landmarker under the stream's index, so each stream keeps its own
+    # face ROI in the workers.
+    def __init__(self, index, source, landmarker):
+        self.name = f"stream {index} ({source})"
+        self.capture = open_stream_source(source)
+        if not self.capture.isOpened():
+            raise IOError(f"Unable to open stream source: {source}")
+        self.timers = StageTimers()
+        self.grabber = FrameGrabber(self.capture, timers=self.timers)
+        self.scheduler = FrameScheduler()
+        self.preparer = FramePreparer()
+        self.eye_tracker = EyeBlinkTracker() if EYE_TRACKER_ENABLED else None
+        if self.eye_tracker is not None:
+            self.grabber.add_hook(self.eye_tracker.process, "eye_tracker")
+        self.analyzer = FrameAnalyzer(self.timers, landmarker, key=index, eye_tracker=self.eye_tracker)
+        self.analyzer.subscribe(self.log_events, "event_log")
+        self.metrics = MetricsTimeSeries()
+        self.analyzer.subscribe(self.metrics.record, "metrics")
+        self.last_result = None
+        self.running = False
+        self.thread = None
+    
+    def start(self):
+        self.running = True
+        self.grabber.start()
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+    
+    def _run(self):
+        while self.running:
+            frame, current_time = self.grabber.read_latest()
+            if frame is None:
+                if self.grabber.failed:
+                    print(f"[{self.name}] Unable to read frames, stream stopped")
+                    break
+                continue
+            
+            frame_start = time.perf_counter()
+            self.analyzer.control_mode = control_mode
+            self.analyzer.strict_mode = strict_mode
+            frame, rgb_frame = self.preparer.prepare(frame)
+            self.timers.record("flip+cvtColor", time.perf_counter() - frame_start)
+            self.last_result = self.analyzer.process(frame, rgb_frame, current_time)
+            self.timers.record("frame_total", time.perf_counter() - frame_start)
+            self.timers.record("frame_age", time.time() - current_time)
+            
+            self.scheduler.set_target_fps(target_frame_rate(self.analyzer))
+            self.scheduler.wait()
+        
+        self.grabber.stop()
+        self.capture.release()
+    
+    def log_events(self, result):
+        for event in result.events:
+            if event[0] == "alert":
+                print(f"[{self.name}] {event[1]}: {event[2]}")
+            else:
+                print(f"[{self.name}] {event[0]}")
+    
+    def status(self):
+        result = self.last_result
+        if result is None:
+            return f"[{self.name}] waiting for frames"
+        histogram = self.timers.stages.get("frame_total")
+        p50, p95 = histogram.percentiles((50, 95)) if histogram is not None else (0.0, 0.0)
+        return (f"[{self.name}] {self.scheduler.achieved_fps:.1f} fps, frame p50 {p50 * 1000:.1f} ms "
+                f"p95 {p95 * 1000:.1f} ms, {'face' if result.face else 'no face'}, "
+                f"{'playing' if result.playing else 'paused'}, {self.grabber.dropped_frames} frames dropped")
+
+def run_server(sources):
+    # Headless monitoring of several streams with one shared inference pool;
+    # each worker loads every model once, whatever the number of streams
+    global inference_pool
+    workers = INFERENCE_WORKERS if INFERENCE_WORKERS > 0 else min(SERVE_INFERENCE_WORKERS, os.cpu_count() or 1)
+    # Enough ring slots for every stream to have face and hands requests in
+    # flight at once; worker queues are FIFO, so streams are served in turn
+    slots_per_worker = max(INFERENCE_SLOTS_PER_WORKER, -(-2 * len(sources) // workers))
+    inference_pool = ProcessPoolLandmarker(workers, slots_per_worker)
+    streams = []
+    try:
+        streams = [MonitoringStream(index, source, inference_pool) for index, source in enumerate(sources)]
+        for stream in streams:
+            stream.start()
+        print(f"Serving {len(streams)} streams with {workers} inference workers, press Ctrl+C to stop")
+        while any(stream.thread.is_alive() for stream in streams):
+            time.sleep(SERVE_REPORT_INTERVAL)
+            for stream in streams:
+                print(stream.status())
+    except KeyboardInterrupt:
+        print("Stopping streams...")
+    finally:
+        for stream in streams:
+            stream.stop()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for index, stream in enumerate(streams):
+            print(stream.name)
+            stream.timers.dump(f"latency_stats_stream{index}_{stamp}.txt")
+            stream.metrics.dump(f"session_metrics_stream{index}_{stamp}")
+        inference_pool.close()
+
 class StudyHelperApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -353,8 +2485,23 @@ class StudyHelperApp(ctk.CTk):
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
         
+        global alert_dispatcher
+        alert_dispatcher = AlertDispatcher(self)
+        alert_dispatcher.start()
+        
         self.create_frames()
+        self.ui_bridge = UIBridge(self, {
+            "distance": self.distance_status_label,
+            "drowsiness": self.drowsiness_status_label,
+            "blinks": self.blink_stats_label,
+            "frame_rate": self.fps_label,
+            "models": self.models_label,
+        })
+        self.ui_bridge.start()
+        self.update_model_status()
         self.initialize_variables()
+        # Runs once the window has been drawn and the event loop is taking input
+        self.after_idle(self.on_window_ready)
         
     def create_frames(self):
         # Control Mode Frame
@@ -397,6 +2544,10 @@ class StudyHelperApp(ctk.CTk):
         self.close_threshold_var = ctk.StringVar(value=str(CLOSE_THRESHOLD))
         self.create_threshold_entry("Close Threshold:", self.close_threshold_var)
         
+        # Target analysis rate in face detection mode
+        self.face_fps_var = ctk.StringVar(value=str(FACE_MODE_FPS))
+        self.create_threshold_entry("Target FPS:", self.face_fps_var)
+        
         ctk.CTkButton(
             self.threshold_frame,
             text="Update Thresholds",
@@ -428,6 +2579,28 @@ class StudyHelperApp(ctk.CTk):
         )
         self.drowsiness_status_label.pack(pady=5)
         
+        self.blink_stats_label = ctk.CTkLabel(
+            self.status_frame,
+            text="Blinks: --",
+            font=ctk.CTkFont(size=14)
+        )
+        self.blink_stats_label.pack(pady=5)
+        
+        self.fps_label = ctk.CTkLabel(
+            self.status_frame,
+            text="Frame Rate: --",
+            font=ctk.CTkFont(size=14)
+        )
+        self.fps_label.pack(pady=5)
+        
+        self.models_label = ctk.CTkLabel(
+            self.status_frame,
+            text="",
+            font=ctk.CTkFont(size=14),
+            justify="left"
+        )
+        self.models_label.pack(pady=5)
+        
         # Control Buttons Frame
         self.control_buttons_frame = ctk.CTkFrame(self)
         self.control_buttons_frame.grid(row=3, column=0, columnspan=2, padx=20, pady=(10, 20), sticky="nsew")
@@ -466,6 +2639,20 @@ class StudyHelperApp(ctk.CTk):
             command=self.toggle_ai_assistant
         )
         self.ai_assistant_btn.pack(pady=10)
+        
+        self.latency_stats_btn = ctk.CTkButton(
+            self.control_buttons_frame,
+            text="Dump Latency Stats",
+            command=self.dump_latency_stats
+        )
+        self.latency_stats_btn.pack(pady=10)
+        
+        self.export_metrics_btn = ctk.CTkButton(
+            self.control_buttons_frame,
+            text="Export Session Metrics",
+            command=self.export_metrics
+        )
+        self.export_metrics_btn.pack(pady=10)
     
     def create_threshold_entry(self, label_text, variable):
         frame = ctk.CTkFrame(self.threshold_frame)
@@ -476,7 +2663,6 @@ class StudyHelperApp(ctk.CTk):
     
     def initialize_variables(self):
         # global ai_assistant, cap
-        self.use_gestures = False
         self.strict_mode = False
         self.monitoring = False
         self.monitor_thread = None
@@ -484,43 +2670,98 @@ class StudyHelperApp(ctk.CTk):
         self.cap = None
         
         # Initialize camera
-        init_camera()
+        init_camera(probe=CAMERA_PROBE_ON_START)
         
         # Set up window close handler
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def on_window_ready(self):
+        self.interactive_seconds = time.perf_counter() - LAUNCH_TIME
+        print(f"Window interactive {self.interactive_seconds:.2f}s after launch")
+        # Face detection is the default mode, so have Face Mesh ready before monitoring starts
+        for model in (face_detector, face_mesh, face_mesh_roi):
+            model.warm_up(on_done=self.on_model_loaded)
+        self.update_model_status()
+    
+    def on_model_loaded(self, model):
+        # Called on the warm-up thread
+        self.update_model_status()
+    
+    def update_model_status(self):
+        states = {"not loaded": "on demand", "loading": "loading...", "ready": "ready", "failed": "failed"}
+        lines = [f"{model.name}: {states[model.state]}" for model in (face_detector, face_mesh, hands, whisper_model)]
+        self.ui_bridge.update(models=("\n".join(lines), None))
+    
     def toggle_control_mode(self):
-        global use_gestures
-        use_gestures = not use_gestures
-        self.control_mode_label.configure(
-            text="Control Mode: Gesture" if use_gestures else "Control Mode: Face Detection"
-        )
+        # Cycles face detection -> gesture -> face + gesture
+        global control_mode
+        control_mode = CONTROL_MODES[(CONTROL_MODES.index(control_mode) + 1) % len(CONTROL_MODES)]
+        self.control_mode_label.configure(text=f"Control Mode: {CONTROL_MODE_LABELS[control_mode]}")
+        if control_mode != "face":
+            hands.warm_up(on_done=self.on_model_loaded)
+            self.update_model_status()
     
     def update_thresholds(self):
         try:
-            global LOOK_THRESHOLD, SIDE_LOOK_THRESHOLD, CLOSE_THRESHOLD
+            global LOOK_THRESHOLD, SIDE_LOOK_THRESHOLD, CLOSE_THRESHOLD, FACE_MODE_FPS
             LOOK_THRESHOLD = float(self.look_threshold_var.get())
             SIDE_LOOK_THRESHOLD = float(self.side_look_threshold_var.get())
             CLOSE_THRESHOLD = float(self.close_threshold_var.get())
+            face_fps = float(self.face_fps_var.get())
+            if face_fps <= 0:
+                raise ValueError("Target FPS must be positive")
+            FACE_MODE_FPS = face_fps
             CTkMessagebox(title="Success", message="Thresholds updated successfully!", icon="check")
         except ValueError:
             CTkMessagebox(title="Error", message="Invalid input for thresholds. Please enter valid numbers.", icon="cancel")
     
     def toggle_monitoring(self):
-        global monitoring, monitor_thread, cap
+        global monitoring
         if monitoring:
             monitoring = False
             self.status_label.configure(text="Monitoring: OFF", text_color="red")
-            if cap is not None and cap.isOpened():
-                cap.release()
+            # The monitoring thread releases the camera once its capture thread has stopped
+            monitor_stop.set()
         else:
             monitoring = True
             self.status_label.configure(text="Monitoring: ON", text_color="green")
-            if not hasattr(cap, 'isOpened') or not cap.isOpened():
-                if not init_camera():
-                    return
-            monitor_thread = threading.Thread(target=start_monitoring, daemon=True)
-            monitor_thread.start()
+            self.start_session()
+    
+    def start_session(self):
+        global monitor_thread, monitor_stop, monitoring
+        if not monitoring or (monitor_stop is not None and not monitor_stop.is_set()):
+            # Stopped again while waiting, or an earlier wait already started the session
+            return
+        if monitor_thread is not None and monitor_thread.is_alive():
+            # The previous session is still saving its stats and releasing the camera
+            self.after(MONITOR_RESTART_POLL, self.start_session)
+            return
+        if not hasattr(cap, 'isOpened') or not cap.isOpened():
+            if not init_camera():
+                monitoring = False
+                self.status_label.configure(text="Monitoring: OFF", text_color="red")
+                return
+        monitor_stop = threading.Event()
+        monitor_thread = threading.Thread(target=start_monitoring, args=(monitor_stop,), daemon=True)
+        monitor_thread.start()
+    
+    def on_frame_result(self, result):
+        # Runs on the monitoring thread, so it only publishes; the UI bridge
+        # applies the values on the main thread
+        changes = {}
+        if result.distance:
+            changes["distance"] = (f"Distance Status: {result.distance}", DISTANCE_STATUS_COLORS[result.distance])
+        if result.drowsiness:
+            changes["drowsiness"] = (f"Drowsiness Status: {result.drowsiness}",
+                                     DROWSINESS_STATUS_COLORS[result.drowsiness])
+        if result.blink_rate is not None:
+            changes["blinks"] = (f"Blinks: {result.blink_rate:.0f}/min, PERCLOS {result.perclos:.0%}", None)
+        if changes:
+            self.ui_bridge.update(**changes)
+        for event in result.events:
+            if event[0] == "alert":
+                _, title, message, icon = event
+                post_alert(title, message, icon)
     
     def toggle_strict_mode(self):
         global strict_mode
@@ -533,6 +2774,9 @@ class StudyHelperApp(ctk.CTk):
     def toggle_ai_assistant(self):
         # global ai_assistant
         if self.ai_assistant is None:  # Changed from ai_assistant to self.ai_assistant
+            # The listening thread waits for Whisper if it is still loading
+            whisper_model.warm_up(on_done=self.on_model_loaded)
+            self.update_model_status()
             self.ai_assistant = AIAssistant()
             self.ai_assistant.start_listening()
             self.ai_assistant_label.configure(text="AI Assistant: ON", text_color="green")
@@ -541,6 +2785,30 @@ class StudyHelperApp(ctk.CTk):
             self.ai_assistant = None
             self.ai_assistant_label.configure(text="AI Assistant: OFF", text_color="red")
     
+    def dump_latency_stats(self):
+        if monitor_timers is None:
+            CTkMessagebox(title="Latency Stats", message="Start monitoring to collect latency stats.", icon="info")
+            return
+        filename = monitor_timers.dump()
+        CTkMessagebox(title="Latency Stats", message=f"Latency stats saved to {filename}", icon="check")
+    
+    def export_metrics(self):
+        if monitor_metrics is None:
+            CTkMessagebox(title="Session Metrics", message="Start monitoring to record session metrics.", icon="info")
+            return
+        # Writing the CSV takes most of a second for a long session, so only
+        # the snapshot is taken here and the files are written off the main thread
+        rows = monitor_metrics.snapshot()
+        threading.Thread(target=self._write_metrics, args=(monitor_metrics, rows), name="metrics export").start()
+    
+    def _write_metrics(self, metrics, rows):
+        try:
+            basename = metrics.dump(rows=rows)
+        except Exception as e:
+            post_alert("Error", f"Unable to save session metrics: {str(e)}", "cancel")
+            return
+        post_alert("Session Metrics", f"Session metrics saved to {basename}.npy and {basename}.csv", "check")
+    
     def on_closing(self):
         # global cap, ai_assistant
         
@@ -548,8 +2816,47 @@ class StudyHelperApp(ctk.CTk):
             self.cap.release()
         if self.ai_assistant is not None:  # Changed from ai_assistant to self.ai_assistant
             self.ai_assistant.stop_listening()
+        if inference_pool is not None:
+            inference_pool.close()
         self.quit()
 
 if __name__ == "__main__":
-    app = StudyHelperApp()
-    app.mainloop() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="FocusFlow: your AI study companion")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="run the detection pipeline headless on a video file or a directory of frames")
+    parser.add_argument("--replay-log", metavar="CSV", help="where to write the per-frame decision log")
+    parser.add_argument("--replay-fps", type=float,
+                        help="frame rate of the recording (defaults to the video's own, or 30 for frame directories)")
+    parser.add_argument("--serve", nargs="+", metavar="SOURCE",
+                        help="monitor camera indices or video files headless, sharing one inference pool")
+    parser.add_argument("--mode", choices=CONTROL_MODES, default=control_mode, help="control mode to replay or serve in")
+    parser.add_argument("--cpu-budget", type=float, default=INFERENCE_CPU_BUDGET,
+                        help="share of one CPU core the landmark models may use in combined mode")
+    parser.add_argument("--inference-workers", type=int, default=INFERENCE_WORKERS,
+                        help="run the landmark models in this many worker processes (0 = in-process)")
+    parser.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL,
+                        help="run FaceMesh on every Nth frame and track landmarks with optical flow in between")
+    parser.add_argument("--no-eye-tracker", action="store_true",
+                        help="time blinks from FaceMesh frames only, without the capture-rate eye tracker")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print the time from launch until the window is interactive, then exit")
+    args = parser.parse_args()
+    INFERENCE_WORKERS = args.inference_workers
+    INFERENCE_CPU_BUDGET = args.cpu_budget
+    KEYFRAME_INTERVAL = args.keyframe_interval
+    EYE_TRACKER_ENABLED = not args.no_eye_tracker
+    
+    if args.serve:
+        control_mode = args.mode
+        run_server(args.serve)
+    elif args.replay:
+        control_mode = args.mode
+        run_replay(args.replay, args.replay_log, args.replay_fps)
+        if inference_pool is not None:
+            inference_pool.close()
+    else:
+        app = StudyHelperApp()
+        if args.measure_startup:
+            # Queued behind on_window_ready, so the window has been drawn first
+            app.after_idle(app.on_closing)
+        app.mainloop() 
\ No newline at end of file
@@ -0,0 +1,180 @@
+# Regenerates the short clips the benchmark suite runs on.
+#
+# By default the fixtures are synthesized so they are reproducible on any
+# machine: the face clip moves a public-domain portrait (scikit-image's
+# "astronaut", NASA) around a 640x480 frame with a short absence, the hand
+# clip renders a shaded hand that pinches thumb and index finger together and
+# lets go, and the speech clip is a voiced, syllable-paced harmonic signal.
+# Use --record-video / --record-hand-video / --record-audio to replace them
+# with a real webcam or microphone recording.
+#
+# scikit-image is only needed here, to synthesize the face clip, and is not
+# one of FocusFlow's own requirements: pip install scikit-image
+
+import argparse
+import os
+import time
+import wave
+
+import cv2
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+FACE_CLIP = os.path.join(DATA_DIR, "face_640x480.mp4")
+HAND_CLIP = os.path.join(DATA_DIR, "hand_640x480.mp4")
+SPEECH_CLIP = os.path.join(DATA_DIR, "speech_16k.wav")
+
+VIDEO_SIZE = (640, 480)
+VIDEO_FPS = 30
+AUDIO_RATE = 16000
+
+# Hand clip: joints of the index finger and thumb, relative to the bottom of
+# the palm, with the hand open and pinching. The other fingers stay straight
+HAND_SCALE = 1.4
+HAND_SKIN = (105, 150, 205)
+INDEX_OPEN = [(-42, -110), (-49, -151), (-54, -177), (-58, -198)]
+INDEX_PINCH = [(-42, -110), (-46, -138), (-58, -156), (-70, -146)]
+THUMB_OPEN = [(-50, -25), (-82, -52), (-108, -74), (-128, -92)]
+THUMB_PINCH = [(-50, -25), (-70, -64), (-76, -104), (-70, -140)]
+# Base, angle in degrees and phalanx lengths of the middle, ring and little fingers
+STRAIGHT_FINGERS = [((-14, -120), -3, (48, 30, 24)), ((14, -118), 4, (44, 28, 22)), ((40, -105), 12, (34, 22, 18))]
+
+def synthesize_face_clip(path, seconds=4):
+    try:
+        from skimage import data
+    except ImportError:
+        raise SystemExit("Synthesizing the face clip needs scikit-image: pip install scikit-image")
+    
+    portrait = cv2.cvtColor(data.astronaut(), cv2.COLOR_RGB2BGR)[20:240, 110:340]
+    portrait = cv2.resize(portrait, None, fx=1.4, fy=1.4)
+    patch_h, patch_w = portrait.shape[:2]
+    width, height = VIDEO_SIZE
+    frame_count = seconds * VIDEO_FPS
+    
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), VIDEO_FPS, VIDEO_SIZE)
+    for index in range(frame_count):
+        frame = np.full((height, width, 3), 80, dtype=np.uint8)
+        # The last quarter of the clip has nobody in view
+        if index < frame_count * 3 // 4:
+            x = (width - patch_w) // 2 + int(60 * np.sin(index / 10))
+            y = (height - patch_h) // 2 + int(15 * np.cos(index / 13))
+            frame[y:y + patch_h, x:x + patch_w] = portrait
+        writer.write(frame)
+    writer.release()
+
+def synthesize_hand_clip(path, seconds=4):
+    # Open hand for a second, a half-second pinch, a second held, then let go
+    width, height = VIDEO_SIZE
+    frame_count = seconds * VIDEO_FPS
+    rng = np.random.default_rng(0)
+    
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), VIDEO_FPS, VIDEO_SIZE)
+    for index in range(frame_count):
+        t = index / VIDEO_FPS
+        pinch = float(np.clip(min(t - 1, 3 - t) * 2, 0, 1))
+        origin = (width // 2 + int(20 * np.sin(t * 1.5)), height - 100 + int(8 * np.cos(t * 2)))
+        frame = np.full((height, width, 3), (95, 105, 110), dtype=np.float64)
+        for mask in hand_masks(origin, pinch, (height, width)):
+            # Shade each part by its distance from the edge so it looks rounded
+            depth = cv2.distanceTransform((mask > 127).astype(np.uint8), cv2.DIST_L2, 5)
+            shade = np.sqrt(np.clip(depth / (10 * HAND_SCALE), 0, 1))[..., None]
+            alpha = (mask / 255.0)[..., None]
+            frame = frame * (1 - alpha) + np.array(HAND_SKIN) * (0.55 + 0.45 * shade) * alpha
+        frame = np.clip(frame + rng.normal(0, 4, frame.shape), 0, 255).astype(np.uint8)
+        writer.write(cv2.GaussianBlur(frame, (3, 3), 0))
+    writer.release()
+
+def hand_masks(origin, pinch, shape):
+    # Palm and wrist, then one mask per phalanx so creases show between them
+    x, y = origin
+    s = HAND_SCALE
+    palm = np.zeros(shape, np.uint8)
+    cv2.ellipse(palm, (x, int(y - 55 * s)), (int(62 * s), int(68 * s)), 0, 0, 360, 255, -1, cv2.LINE_AA)
+    cv2.rectangle(palm, (int(x - 45 * s), int(y - 20 * s)), (int(x + 45 * s), shape[0]), 255, -1)
+    masks = [palm]
+    
+    blend = lambda opened, pinched: [(ox + (px - ox) * pinch, oy + (py - oy) * pinch)
+                                     for (ox, oy), (px, py) in zip(opened, pinched)]
+    chains = [(blend(INDEX_OPEN, INDEX_PINCH), 24)]
+    for (bx, by), angle, lengths in STRAIGHT_FINGERS:
+        direction = np.array([np.sin(np.radians(angle)), -np.cos(np.radians(angle))])
+        joints = [np.array([bx, by], dtype=float)]
+        for length in lengths:
+            joints.append(joints[-1] + length * direction)
+        chains.append((joints, 24))
+    chains.append((blend(THUMB_OPEN, THUMB_PINCH), 28))
+    
+    for joints, thickness in chains:
+        for i in range(len(joints) - 1):
+            start = tuple(np.int32([x + joints[i][0] * s, y + joints[i][1] * s]))
+            end = tuple(np.int32([x + joints[i + 1][0] * s, y + joints[i + 1][1] * s]))
+            phalanx_width = int(thickness * s * (1 - 0.08 * i))
+            mask = np.zeros(shape, np.uint8)
+            cv2.line(mask, start, end, 255, phalanx_width, cv2.LINE_AA)
+            cv2.circle(mask, start, phalanx_width // 2, 255, -1)
+            cv2.circle(mask, end, phalanx_width // 2, 255, -1, cv2.LINE_AA)
+            masks.append(mask)
+    return masks
+
+def synthesize_speech_clip(path, seconds=6):
+    t = np.arange(seconds * AUDIO_RATE) / AUDIO_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / AUDIO_RATE
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 12))
+    # Roughly four syllables a second with short pauses between words
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.5 * t) > -0.6)
+    samples = voice * envelope
+    samples = (samples / np.abs(samples).max() * 0.6 * 32767).astype(np.int16)
+    write_wav(path, samples.tobytes())
+
+def write_wav(path, pcm16, rate=AUDIO_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm16)
+
+def record_video_clip(path, seconds):
+    capture = cv2.VideoCapture(0)
+    capture.set(cv2.CAP_PROP_FRAME_WIDTH, VIDEO_SIZE[0])
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, VIDEO_SIZE[1])
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), VIDEO_FPS, VIDEO_SIZE)
+    end = time.time() + seconds
+    while time.time() < end:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        writer.write(cv2.resize(frame, VIDEO_SIZE))
+    writer.release()
+    capture.release()
+
+def record_speech_clip(path, seconds):
+    import speech_recognition as sr
+    
+    with sr.Microphone(sample_rate=AUDIO_RATE) as source:
+        print(f"Recording {seconds}s of audio, say a few FocusFlow commands...")
+        audio = sr.Recognizer().record(source, duration=seconds)
+    write_wav(path, audio.get_raw_data(convert_rate=AUDIO_RATE, convert_width=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate the FocusFlow benchmark fixtures")
+    parser.add_argument("--record-video", type=float, metavar="SECONDS", help="record the face clip from the webcam")
+    parser.add_argument("--record-hand-video", type=float, metavar="SECONDS",
+                        help="record the hand clip from the webcam, pinching thumb and index finger together")
+    parser.add_argument("--record-audio", type=float, metavar="SECONDS", help="record the speech clip from the microphone")
+    args = parser.parse_args()
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    if args.record_video:
+        record_video_clip(FACE_CLIP, args.record_video)
+    else:
+        synthesize_face_clip(FACE_CLIP)
+    if args.record_hand_video:
+        record_video_clip(HAND_CLIP, args.record_hand_video)
+    else:
+        synthesize_hand_clip(HAND_CLIP)
+    if args.record_audio:
+        record_speech_clip(SPEECH_CLIP, args.record_audio)
+    else:
+        synthesize_speech_clip(SPEECH_CLIP)
+    print(f"Fixtures written to {DATA_DIR}")
@@ -0,0 +1,314 @@
+# FocusFlow benchmark suite. Runs without a webcam or microphone on the clips
+# in benchmarks/data and writes a JSON result file that can be compared
+# across commits:
+#
+#     python benchmarks/run_benchmarks.py
+#     python benchmarks/run_benchmarks.py --compare results/old.json results/new.json
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import wave
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(ROOT_DIR, "FocusFlow-1.0.0.py")
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+FACE_CLIP = os.path.join(DATA_DIR, "face_640x480.mp4")
+# A hand that pinches thumb and index finger together once and lets go
+HAND_CLIP = os.path.join(DATA_DIR, "hand_640x480.mp4")
+SPEECH_CLIP = os.path.join(DATA_DIR, "speech_16k.wav")
+# The bundled speech clip is the harmonic tone make_fixtures.py synthesizes,
+# not speech, so its Whisper timing does not stand for command transcription.
+# Set this to False after recording a real clip with --record-audio.
+SPEECH_CLIP_SYNTHETIC = True
+
+STARTUP_RUNS = 3
+SPEECH_RUNS = 3
+HANDOFF_RUNS = 20
+# Typical microphone rate; the speech clip is resampled to it so the
+# hand-off benchmark converts audio the way a live capture does
+MIC_SAMPLE_RATE = 44100
+
+# Metrics shown by --compare, with whether a higher value is better
+COMPARED_METRICS = [
+    ("startup.import_seconds", False),
+    ("startup.interactive_seconds", False),
+    ("face_mode.fps", True),
+    ("face_mode.latency_ms.p95", False),
+    ("gesture_mode.fps", True),
+    ("gesture_mode.latency_ms.p95", False),
+    ("combined_mode.fps", True),
+    ("combined_mode.latency_ms.p95", False),
+    ("audio_handoff.in_memory_ms", False),
+    ("speech.real_time_factor", False),
+    ("peak_rss_mb", False),
+]
+
+def load_focusflow():
+    # The app file name is not a valid module name, so load it by path
+    spec = importlib.util.spec_from_file_location("focusflow", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def latency_summary(samples):
+    samples = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+    return {"mean": float(samples.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def benchmark_startup(runs=STARTUP_RUNS):
+    # Each run imports the app in a fresh interpreter, model construction included
+    code = (
+        "import importlib.util, time\n"
+        "start = time.perf_counter()\n"
+        f"spec = importlib.util.spec_from_file_location('focusflow', {APP_PATH!r})\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    results = {"import_seconds": float(np.median(times)), "runs": times}
+    
+    # Launch-to-interactive needs a display to open the window on
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        interactive = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, APP_PATH, "--measure-startup"],
+                                    capture_output=True, text=True, check=True).stdout
+            match = re.search(r"Window interactive ([\d.]+)s after launch", output)
+            if match:
+                interactive.append(float(match.group(1)))
+        if interactive:
+            results["interactive_seconds"] = float(np.median(interactive))
+            results["interactive_runs"] = interactive
+    return results
+
+def warm_up_models(focusflow):
+    # Models load on first use; build them here so their load time is not
+    # counted as frame latency
+    for model in (focusflow.face_detector, focusflow.face_mesh, focusflow.face_mesh_roi, focusflow.hands):
+        model.get()
+
+def benchmark_vision(focusflow, clip, control_mode):
+    # Frames are decoded up front so only the per-frame pipeline is timed
+    source = focusflow.ReplaySource(clip)
+    frames = [(frame.copy(), timestamp) for frame, timestamp in source.frames()]
+
+    preparer = focusflow.FramePreparer()
+    analyzer = focusflow.FrameAnalyzer()
+    analyzer.control_mode = control_mode
+
+    latencies = []
+    face_frames = blinks = pinches = 0
+    was_pinched = False
+    base_time = time.time()
+    start = time.perf_counter()
+    for frame, timestamp in frames:
+        frame_start = time.perf_counter()
+        bgr_frame, rgb_frame = preparer.prepare(frame)
+        result = analyzer.process(bgr_frame, rgb_frame, base_time + timestamp)
+        latencies.append(time.perf_counter() - frame_start)
+        face_frames += result.face
+        blinks += result.blink == "start"
+        pinched = analyzer.gesture_paused
+        pinches += pinched and not was_pinched
+        was_pinched = pinched
+    elapsed = time.perf_counter() - start
+    analyzer.landmarker.close()
+
+    stages = {}
+    for stage, histogram in analyzer.timers.stages.items():
+        stages[stage] = float(histogram.percentiles((50,))[0] * 1000)
+    return {
+        "clip": os.path.relpath(clip, ROOT_DIR),
+        "frames": len(frames),
+        "fps": len(frames) / elapsed,
+        "latency_ms": latency_summary(latencies),
+        "stage_p50_ms": stages,
+        "face_frames": face_frames,
+        "blinks": blinks,
+        "pinches": pinches,
+    }
+
+def load_command_audio(wav_path):
+    # The clip as the AudioData a microphone capture hands over
+    import speech_recognition as sr
+    with sr.AudioFile(wav_path) as source:
+        audio = sr.Recognizer().record(source)
+    return sr.AudioData(audio.get_raw_data(convert_rate=MIC_SAMPLE_RATE), MIC_SAMPLE_RATE, audio.sample_width)
+
+def benchmark_audio_handoff(focusflow, wav_path, runs=HANDOFF_RUNS):
+    # Per-command cost of getting a captured utterance into Whisper: the old
+    # temp WAV file (write, decode from disk as transcribe() does for a path,
+    # delete) against the in-memory conversion the assistant now uses
+    from faster_whisper import decode_audio
+    
+    audio = load_command_audio(wav_path)
+    temp_path = os.path.join(BENCH_DIR, "temp_audio.wav")
+    
+    def via_file():
+        with open(temp_path, "wb") as f:
+            f.write(audio.get_wav_data())
+        samples = decode_audio(temp_path)
+        os.remove(temp_path)
+        return samples
+    
+    def in_memory():
+        return focusflow.audio_to_array(audio)
+    
+    results = {"clip": os.path.relpath(wav_path, ROOT_DIR),
+               "audio_seconds": len(audio.frame_data) / audio.sample_width / audio.sample_rate}
+    for name, handoff in (("wav_file_ms", via_file), ("in_memory_ms", in_memory)):
+        handoff()
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            handoff()
+            times.append(time.perf_counter() - start)
+        results[name] = float(np.median(times) * 1000)
+    results["saved_ms"] = results["wav_file_ms"] - results["in_memory_ms"]
+    return results
+
+def benchmark_speech(focusflow, wav_path, runs=SPEECH_RUNS):
+    with wave.open(wav_path, "rb") as f:
+        audio_seconds = f.getnframes() / f.getframerate()
+    samples = focusflow.audio_to_array(load_command_audio(wav_path))
+
+    def transcribe():
+        segments, _ = focusflow.whisper_model.get().transcribe(samples)
+        return " ".join(segment.text for segment in segments)
+
+    # The first call loads the model and pays one-off decoder setup
+    transcribe()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        transcribe()
+        times.append(time.perf_counter() - start)
+    median = float(np.median(times))
+    return {
+        "clip": os.path.relpath(wav_path, ROOT_DIR),
+        "synthetic": SPEECH_CLIP_SYNTHETIC,
+        "audio_seconds": audio_seconds,
+        "load_seconds": focusflow.whisper_model.load_seconds,
+        "transcribe_seconds": median,
+        "real_time_factor": median / audio_seconds,
+    }
+
+def run_all():
+    commit, dirty = git_revision()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+    # A section that fails (a model that cannot be downloaded offline, say)
+    # is recorded as None so the sections already measured are still saved
+    def run_section(key, label, benchmark, *args):
+        print(f"Measuring {label}...")
+        try:
+            results[key] = benchmark(*args)
+        except Exception as e:
+            print(f"Skipped {label}: {type(e).__name__}: {str(e)}")
+            results[key] = None
+
+    run_section("startup", "startup time", benchmark_startup)
+    focusflow = load_focusflow()
+    try:
+        warm_up_models(focusflow)
+    except Exception as e:
+        # The vision sections load whatever is missing themselves, or fail on their own
+        print(f"Model warm-up failed: {type(e).__name__}: {str(e)}")
+
+    run_section("face_mode", "face mode", benchmark_vision, focusflow, FACE_CLIP, "face")
+    run_section("gesture_mode", "gesture mode", benchmark_vision, focusflow, HAND_CLIP, "gesture")
+    run_section("combined_mode", "combined mode", benchmark_vision, focusflow, FACE_CLIP, "combined")
+    run_section("audio_handoff", "audio hand-off to Whisper", benchmark_audio_handoff, focusflow, SPEECH_CLIP)
+    run_section("speech", "Whisper transcription" + (" on the synthetic clip" if SPEECH_CLIP_SYNTHETIC else ""),
+                benchmark_speech, focusflow, SPEECH_CLIP)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def lookup(results, dotted_key):
+    value = results
+    for key in dotted_key.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{'metric':<42}{'old':>12}{'new':>12}{'change':>10}")
+    for metric, higher_is_better in COMPARED_METRICS:
+        old_value = lookup(old, metric)
+        new_value = lookup(new, metric)
+        if old_value is None or new_value is None:
+            continue
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        better = (change > 0) == higher_is_better
+        if metric.startswith("speech.") and (lookup(old, "speech.synthetic") or lookup(new, "speech.synthetic")):
+            metric += " (synthetic)"
+        print(f"{metric:<42}{old_value:>12.3f}{new_value:>12.3f}{change:>+9.1f}%{'' if change == 0 else (' better' if better else ' worse')}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the FocusFlow benchmark suite")
+    parser.add_argument("--output", metavar="JSON", help="where to write the results (defaults to benchmarks/results/)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    results = run_all()
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        revision = (results["commit"] or "unknown")[:8]
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{revision}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Benchmark results saved to {output}")